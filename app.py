@@ -10,17 +10,20 @@ Date: Sept. 3, 2025
 
 import streamlit as st
 import json
+import hashlib
+import io
 import uuid
-from typing import Dict, List, Any, Optional
-from io import StringIO
+from typing import Dict, List, Any, Optional, Tuple
 import pandas as pd
 import os
 import re
-import subprocess
-import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache, partial
 from cryptography.hazmat.primitives import serialization
 import plotly.graph_objects as go
-import plotly.express as px
 
 # Try to import Snowflake connector, but don't fail if not available (for Snowflake Native App)
 try:
@@ -30,83 +33,78 @@ try:
 except ImportError:
     SNOWFLAKE_CONNECTOR_AVAILABLE = False
 
-# Environment detection
-IS_SNOWFLAKE_NATIVE = False
+# Prefer orjson (Rust/SIMD) for reading and writing the rules file, falling back to the stdlib json module
 try:
-    # Method 1: Check for explicit Snowflake Streamlit indicator (most reliable)
-    if os.environ.get("SNOWFLAKE_STREAMLIT") == "1":
-        IS_SNOWFLAKE_NATIVE = True
-    
-    # Method 2: Check for specific Snowflake Native App environment patterns
-    elif (os.environ.get("SNOWFLAKE_HOST") and 
-          os.environ.get("SNOWFLAKE_ACCOUNT") and
-          # Additional check: Snowflake Native typically runs on specific ports
-          (os.environ.get("STREAMLIT_SERVER_PORT") == "8080" or 
-           os.environ.get("SERVER_PORT") == "8080")):
-        IS_SNOWFLAKE_NATIVE = True
-    
-    # Method 3: Test for Snowflake Native by connection capability
-    # Use more specific local environment indicators
-    else:
-        # Check for definitive local development indicators
-        is_local_environment = False
-        
-        # Check for local development specific indicators
-        if (os.environ.get("STREAMLIT_SERVER_ADDRESS") or           # Local streamlit server
-            os.path.exists(".streamlit/config.toml") or            # Local streamlit config
-            os.path.exists(".env") or                              # Local env file
-            os.path.exists(".venv") or                             # Local virtual environment
-            os.path.exists("venv") or                              # Local virtual environment
-            os.path.exists(".git")):                               # Local git repository
-            is_local_environment = True
-        
-        # Check for Snowflake config files that indicate local setup
-        home_dir = os.path.expanduser("~")
-        snowflake_config_paths = [
-            os.path.join(home_dir, ".snowflake", "connections"),
-            os.path.join(home_dir, ".snowsql", "config"),
-            os.path.join(home_dir, ".snowflake", "config"),
-        ]
-        
-        for config_path in snowflake_config_paths:
-            if os.path.exists(config_path):
-                is_local_environment = True
-                break
-        
-        # Only proceed with connection test if we don't have strong local indicators
-        if not is_local_environment:
-            try:
-                # Import streamlit to test connection capability
-                import streamlit as st_test
-                
-                # Check for local secrets - if we have them, we're definitely local
-                has_local_secrets = False
-                try:
-                    if "connections" in st_test.secrets and "snowflake" in st_test.secrets.connections:
-                        has_local_secrets = True
-                except:
-                    pass
-                
-                # Only test connection if we don't have local secrets
-                if not has_local_secrets:
-                    try:
-                        # Try to create a snowflake connection
-                        test_conn = st_test.connection("snowflake")
-                        if test_conn:
-                            # Try a simple query
-                            test_result = test_conn.query("SELECT CURRENT_USER() as current_user", ttl=0)
-                            if test_result is not None and not test_result.empty:
-                                # Success without local indicators = likely Snowflake Native
-                                IS_SNOWFLAKE_NATIVE = True
-                    except:
-                        # Connection failed, not Snowflake Native
-                        pass
-            except:
-                # Can't test connection, not Snowflake Native
-                pass
-            
-except Exception:
-    pass
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# pyarrow ships with snowflake-connector-python[pandas]; query results keep Arrow-backed columns when present
+try:
+    import pyarrow  # noqa: F401 - only its availability is checked
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Environment detection
+def _has_local_environment_indicators() -> bool:
+    """Check for files and settings that only exist in a local development setup"""
+    # Check for local development specific indicators
+    if (os.environ.get("STREAMLIT_SERVER_ADDRESS") or           # Local streamlit server
+        os.path.exists(".streamlit/config.toml") or            # Local streamlit config
+        os.path.exists(".env") or                              # Local env file
+        os.path.exists(".venv") or                             # Local virtual environment
+        os.path.exists("venv") or                              # Local virtual environment
+        os.path.exists(".git")):                               # Local git repository
+        return True
+    
+    # Check for Snowflake config files that indicate local setup
+    home_dir = os.path.expanduser("~")
+    snowflake_config_paths = [
+        os.path.join(home_dir, ".snowflake", "connections"),
+        os.path.join(home_dir, ".snowsql", "config"),
+        os.path.join(home_dir, ".snowflake", "config"),
+    ]
+    return any(os.path.exists(config_path) for config_path in snowflake_config_paths)
+
+def _probe_snowflake_native() -> bool:
+    """Test for Snowflake Native by connection capability"""
+    # Check for local secrets - if we have them, we're definitely local
+    try:
+        if "connections" in st.secrets and "snowflake" in st.secrets.connections:
+            return False
+    except Exception:
+        pass
+    
+    try:
+        # Try to create a snowflake connection and run a simple query
+        test_result = st.connection("snowflake").query("SELECT CURRENT_USER() as current_user", ttl=0)
+        # Success without local indicators = likely Snowflake Native
+        return test_result is not None and not test_result.empty
+    except Exception:
+        # Connection failed, not Snowflake Native
+        return False
+
+# app.py is the main script, so its body re-executes on every rerun; st.cache_resource keeps the
+# detection (file checks and a possible connection probe) to once per process
+@st.cache_resource(show_spinner=False)
+def _detect_snowflake_native() -> bool:
+    """Detect whether the app runs as a Snowflake Native (Streamlit in Snowflake) app"""
+    return (
+        # Method 1: Check for explicit Snowflake Streamlit indicator (most reliable)
+        os.environ.get("SNOWFLAKE_STREAMLIT") == "1"
+        # Method 2: Check for specific Snowflake Native App environment patterns
+        # (Snowflake Native typically runs on port 8080)
+        or bool(os.environ.get("SNOWFLAKE_HOST") and
+                os.environ.get("SNOWFLAKE_ACCOUNT") and
+                (os.environ.get("STREAMLIT_SERVER_PORT") == "8080" or
+                 os.environ.get("SERVER_PORT") == "8080"))
+        # Method 3: Only probe the connection if we don't have strong local indicators
+        or (not _has_local_environment_indicators() and _probe_snowflake_native())
+    )
+
+IS_SNOWFLAKE_NATIVE = _detect_snowflake_native()
 
 # Custom CSS for better styling
 st.markdown("""
@@ -168,20 +166,113 @@ section.main > div.block-container {
     color: #dc3545;
     font-weight: bold;
 }
+/* Space between the dashboard KPI row and the sections below it */
+.st-key-kpi-row {
+    margin-bottom: 1.5rem;
+}
+/* Left-aligned text for the sidebar navigation buttons */
+div[data-testid="stSidebar"] .stButton > button {
+    text-align: left !important;
+    justify-content: flex-start !important;
+}
 </style>
 """, unsafe_allow_html=True)
 
+# Dismissible message kinds: emoji, accent RGB (background/border) and text RGB
+DISMISSIBLE_KINDS = {
+    "error": ("🚨", (255, 75, 75), (120, 10, 10)),
+    "warning": ("⚠️", (255, 196, 0), (147, 112, 0)),
+    "info": ("ℹ️", (0, 178, 255), (0, 104, 181)),
+    "success": ("✅", (33, 195, 84), (23, 114, 51)),
+}
+
+# The script body reruns on every interaction, so cache the generated stylesheet across reruns
+@st.cache_resource(show_spinner=False)
+def _build_dismissible_css() -> str:
+    """Build the stylesheet for dismissible message buttons, one rule set per message kind"""
+    rules = ["""
+div[class*="st-key-msg-"] button {
+    width: 100% !important;
+    text-align: left !important;
+    border-radius: 0.5rem !important;
+    padding: 0.75rem 1rem !important;
+    font-size: 1rem !important;
+    line-height: 1.6 !important;
+    transition: none !important;
+}
+div[class*="st-key-msg-"] button:hover,
+div[class*="st-key-msg-"] button:active,
+div[class*="st-key-msg-"] button:focus {
+    transform: none !important;
+    box-shadow: none !important;
+}"""]
+    for kind, (_, accent, text) in DISMISSIBLE_KINDS.items():
+        accent_rgb = ", ".join(str(c) for c in accent)
+        text_rgb = ", ".join(str(c) for c in text)
+        selector = f'div[class*="st-key-msg-{kind}-"] button'
+        rules.append(f"""
+{selector},
+{selector}:hover,
+{selector}:active,
+{selector}:focus {{
+    background-color: rgba({accent_rgb}, 0.1) !important;
+    border: 1px solid rgba({accent_rgb}, 0.2) !important;
+    color: rgb({text_rgb}) !important;
+}}""")
+    return "<style>" + "".join(rules) + "\n</style>"
+
+# Dismissible message buttons are wrapped in msg-<kind>-* keyed containers (see dismissible())
+st.markdown(_build_dismissible_css(), unsafe_allow_html=True)
+
 # File path for the JSON data
 JSON_FILE_PATH = "config/dbt_project_evaluator_rules.json"
 
-@st.cache_data
-def load_rules_data() -> Dict[str, Any]:
+def json_loads(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(data: Any) -> bytes:
+    """Serialize data to indented UTF-8 JSON bytes, using orjson when available"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False).encode("utf-8")
+
+def _rules_file_version() -> Optional[int]:
+    """Modification time of the rules file, used to detect edits made by any session"""
+    try:
+        return os.stat(JSON_FILE_PATH).st_mtime_ns
+    except OSError:
+        return None
+
+# Overall time limit for generating the rules. Checked between pages and images, so a request
+# already in flight can still run for its own timeout and retries past it
+RULE_EXTRACTOR_TIMEOUT = 300
+
+def run_rule_extractor() -> Tuple[Dict[str, Any], str]:
+    """Fetch and parse the rule documentation with the rule extractor in this process, returning the rules and its log output"""
+    # Imported lazily: only needed when (re)generating, and pulls in requests
+    from scripts.rule_extractor import DBTRuleParser
+    
+    # The parser writes progress to its own stream; redirecting sys.stdout would also capture other sessions' output
+    log = io.StringIO()
+    parser = DBTRuleParser(log=log, deadline=time.monotonic() + RULE_EXTRACTOR_TIMEOUT)
+    rules_data = parser.generate_complete_json()
+    if not rules_data:
+        raise RuntimeError("No rules data generated")
+    return rules_data, log.getvalue()
+
+# st.cache_data hands every caller its own copy, so callers (e.g. the Import tab) may mutate the result freely
+# file_version (see _rules_file_version) is part of the cache key so edits made outside the app are picked up
+@st.cache_data(show_spinner=False)
+def load_rules_data(file_version: Optional[int] = None) -> Dict[str, Any]:
     """Load rules data from JSON file. If file doesn't exist, run rule extractor script or generate in memory."""
     
     # Check if the config file exists
     if not os.path.exists(JSON_FILE_PATH):
         
-        # In Snowflake Native Apps, subprocess calls don't work the same way
+        # In Snowflake Native Apps, the rules file can't be generated at runtime
         if IS_SNOWFLAKE_NATIVE:
             st.warning("⚠️ Config file not found in Snowflake Native App environment.")
             st.info("📋 Please ensure the dbt_project_evaluator_rules.json file is included in your app package, or upload it manually through the Rule Settings.")
@@ -204,52 +295,67 @@ def load_rules_data() -> Dict[str, Any]:
         
         st.info(f"Config file {JSON_FILE_PATH} not found. Generating rules data...")
         
-        # Try to run the rule extractor script (local environment only)
-        script_path = "scripts/rule_extractor.py"
-        
-        if os.path.exists(script_path):
-            try:
-                # Run the rule extractor script
-                result = subprocess.run([sys.executable, script_path], 
-                                      capture_output=True, 
-                                      text=True, 
-                                      timeout=300)  # 5 minute timeout
-                
-                if result.returncode == 0:
-                    st.success("Rules data generated successfully!")
-                    # Clear the cache to reload data after generation
-                    st.cache_data.clear()
-                else:
-                    st.error(f"Rule extractor script failed with error: {result.stderr}")
-                    return {}
-                    
-            except subprocess.TimeoutExpired:
-                st.error("Rule extractor script timed out after 5 minutes")
-                return {}
-            except Exception as e:
-                st.error(f"Error running rule extractor script: {str(e)}")
-                return {}
-        else:
-            st.error(f"Rule extractor script not found: {script_path}")
+        # Try to run the rule extractor (local environment only)
+        try:
+            rules_data, _ = run_rule_extractor()
+            # Not save_rules_data: its error message has a dismiss button, which cached functions can't replay
+            _write_rules_file(rules_data)
+            st.success("Rules data generated successfully!")
+        except TimeoutError:
+            st.error(f"Rule extractor script timed out after {RULE_EXTRACTOR_TIMEOUT // 60} minutes")
+            return {}
+        except Exception as e:
+            st.error(f"Error running rule extractor script: {str(e)}")
             return {}
     
     # Load the rules data (either existing or newly generated)
     try:
-        with open(JSON_FILE_PATH, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(JSON_FILE_PATH, 'rb') as f:
+            return json_loads(f.read())
     except FileNotFoundError:
         dismissible_error(f"Rules file not found: {JSON_FILE_PATH}", key="rules_file_not_found")
         return {}
-    except json.JSONDecodeError:
+    except json.JSONDecodeError:  # orjson.JSONDecodeError is a subclass
         dismissible_error("Invalid JSON format in rules file", key="invalid_json_format")
         return {}
 
+@st.cache_data(show_spinner=False)
+def export_rules_json(categories: Tuple[str, ...], file_version: Optional[int]) -> bytes:
+    """Serialize the selected categories of the rules file (cached per selection and rules file version)"""
+    rules_data = load_rules_data(file_version)
+    return json_dumps({cat: rules_data[cat] for cat in categories if cat in rules_data})
+
+def _write_rules_file(data: Dict[str, Any]) -> None:
+    """Atomically replace the rules file with data, raising on failure"""
+    rules_dir = os.path.dirname(JSON_FILE_PATH) or "."
+    os.makedirs(rules_dir, exist_ok=True)
+    tmp_path = None
+    try:
+        # Write to a uniquely named temp file and swap it in, so readers never see a partially
+        # written file and concurrent saves from other sessions can't write into the same temp file
+        with tempfile.NamedTemporaryFile('wb', dir=rules_dir, suffix=".tmp", delete=False) as f:
+            tmp_path = f.name
+            f.write(json_dumps(data))
+            f.flush()
+            os.fsync(f.fileno())
+        # NamedTemporaryFile creates files as 0600; keep the rules file's existing permissions
+        try:
+            os.chmod(tmp_path, os.stat(JSON_FILE_PATH).st_mode & 0o777)
+        except FileNotFoundError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, JSON_FILE_PATH)
+        tmp_path = None
+    finally:
+        # Don't leave a partial temp file behind when the write or swap failed
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 def save_rules_data(data: Dict[str, Any]) -> bool:
     """Save rules data to JSON file"""
     try:
-        with open(JSON_FILE_PATH, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        st.cache_data.clear()  # Clear cache to reload data
+        _write_rules_file(data)
+        load_rules_data.clear()  # Only the rules cache is stale; keep cached query results
+        _bump_violations_version()
         return True
     except Exception as e:
         dismissible_error(f"Error saving rules: {str(e)}", key="save_rules_error")
@@ -260,7 +366,7 @@ def regenerate_rules_data() -> bool:
     Regenerate rules data by running the rule extractor script.
     Returns True if successful, False otherwise.
     """
-    # In Snowflake Native Apps, subprocess calls are restricted
+    # In Snowflake Native Apps, the rules file can't be generated at runtime
     if IS_SNOWFLAKE_NATIVE:
         st.error("❌ Rule regeneration is not available in Snowflake Native App environment.")
         st.info("💡 **Alternative options:**")
@@ -271,38 +377,24 @@ def regenerate_rules_data() -> bool:
         """)
         return False
     
-    script_path = "scripts/rule_extractor.py"
-    
-    if not os.path.exists(script_path):
-        st.error(f"Rule extractor script not found: {script_path}")
-        return False
-    
     try:
         with st.spinner("Regenerating rules data..."):
-            result = subprocess.run([sys.executable, script_path], 
-                                  capture_output=True, 
-                                  text=True, 
-                                  timeout=300)  # 5 minute timeout
+            rules_data, output = run_rule_extractor()
         
-        if result.returncode == 0:
-            st.success("✅ Rule settings regenerated successfully!")
-            
-            # Show output in an expander for details
-            with st.expander("View Generation Details"):
-                st.code(result.stdout, language="text")
-            
-            # Clear cache to reload the new data
-            st.cache_data.clear()
-            
-            return True
-        else:
-            st.error("❌ Failed to regenerate rule settings.")
-            st.error("Error details:")
-            st.code(result.stderr, language="text")
+        # Atomic write; also clears the rules cache so the new data is reloaded
+        if not save_rules_data(rules_data):
+            st.error("❌ Failed to save the regenerated rule settings.")
             return False
-            
-    except subprocess.TimeoutExpired:
-        st.error("❌ Rule generation timed out after 5 minutes")
+        
+        st.success("✅ Rule settings regenerated successfully!")
+        
+        # Show output in an expander for details
+        with st.expander("View Generation Details"):
+            st.code(output, language="text")
+        
+        return True
+    except TimeoutError:
+        st.error(f"❌ Rule generation timed out after {RULE_EXTRACTOR_TIMEOUT // 60} minutes")
         return False
     except Exception as e:
         st.error(f"❌ Error running rule extractor script: {str(e)}")
@@ -323,169 +415,26 @@ def create_empty_rule() -> Dict[str, str]:
         "remediation": ""
     }
 
-def dismissible_error(message: str, key: Optional[str] = None) -> None:
-    """Display a dismissible error message - click to dismiss"""
+def dismissible(kind: str, message: str, key: Optional[str] = None) -> None:
+    """Display a dismissible message of the given kind (error, warning, info, success) - click to dismiss"""
+    emoji = DISMISSIBLE_KINDS[kind][0]
     if key is None:
-        key = f"error_{hash(message)}"
-    
-    if f"dismissed_{key}" not in st.session_state:
-        st.session_state[f"dismissed_{key}"] = False
-    
-    if not st.session_state[f"dismissed_{key}"]:
-        # Custom CSS for error button styling
-        st.markdown(f"""
-        <style>
-        .stButton > button[data-testid="baseButton-secondary"] {{
-            background-color: rgba(255, 75, 75, 0.1) !important;
-            border: 1px solid rgba(255, 75, 75, 0.2) !important;
-            color: rgb(120, 10, 10) !important;
-            width: 100% !important;
-            text-align: left !important;
-            border-radius: 0.5rem !important;
-            padding: 0.75rem 1rem !important;
-            font-size: 1rem !important;
-            line-height: 1.6 !important;
-            transition: none !important;
-        }}
-        .stButton > button[data-testid="baseButton-secondary"]:hover,
-        .stButton > button[data-testid="baseButton-secondary"]:active,
-        .stButton > button[data-testid="baseButton-secondary"]:focus {{
-            background-color: rgba(255, 75, 75, 0.1) !important;
-            border: 1px solid rgba(255, 75, 75, 0.2) !important;
-            color: rgb(120, 10, 10) !important;
-            transform: none !important;
-            box-shadow: none !important;
-        }}
-        </style>
-        """, unsafe_allow_html=True)
-        
-        if st.button(f"🚨 {message}", key=f"dismiss_error_{key}", 
-                    type="secondary", use_container_width=True):
-            st.session_state[f"dismissed_{key}"] = True
-            st.rerun()
-
-def dismissible_warning(message: str, key: Optional[str] = None) -> None:
-    """Display a dismissible warning message - click to dismiss"""
-    if key is None:
-        key = f"warning_{hash(message)}"
-    
-    if f"dismissed_{key}" not in st.session_state:
-        st.session_state[f"dismissed_{key}"] = False
-    
-    if not st.session_state[f"dismissed_{key}"]:
-        # Custom CSS for warning button styling
-        st.markdown(f"""
-        <style>
-        .stButton > button[data-testid="baseButton-secondary"] {{
-            background-color: rgba(255, 196, 0, 0.1) !important;
-            border: 1px solid rgba(255, 196, 0, 0.2) !important;
-            color: rgb(147, 112, 0) !important;
-            width: 100% !important;
-            text-align: left !important;
-            border-radius: 0.5rem !important;
-            padding: 0.75rem 1rem !important;
-            font-size: 1rem !important;
-            line-height: 1.6 !important;
-            transition: none !important;
-        }}
-        .stButton > button[data-testid="baseButton-secondary"]:hover,
-        .stButton > button[data-testid="baseButton-secondary"]:active,
-        .stButton > button[data-testid="baseButton-secondary"]:focus {{
-            background-color: rgba(255, 196, 0, 0.1) !important;
-            border: 1px solid rgba(255, 196, 0, 0.2) !important;
-            color: rgb(147, 112, 0) !important;
-            transform: none !important;
-            box-shadow: none !important;
-        }}
-        </style>
-        """, unsafe_allow_html=True)
-        
-        if st.button(f"⚠️ {message}", key=f"dismiss_warning_{key}", 
-                    type="secondary", use_container_width=True):
-            st.session_state[f"dismissed_{key}"] = True
-            st.rerun()
-
-def dismissible_info(message: str, key: Optional[str] = None) -> None:
-    """Display a dismissible info message - click to dismiss"""
-    if key is None:
-        key = f"info_{hash(message)}"
-    
-    if f"dismissed_{key}" not in st.session_state:
-        st.session_state[f"dismissed_{key}"] = False
-    
-    if not st.session_state[f"dismissed_{key}"]:
-        # Custom CSS for info button styling
-        st.markdown(f"""
-        <style>
-        .stButton > button[data-testid="baseButton-secondary"] {{
-            background-color: rgba(0, 178, 255, 0.1) !important;
-            border: 1px solid rgba(0, 178, 255, 0.2) !important;
-            color: rgb(0, 104, 181) !important;
-            width: 100% !important;
-            text-align: left !important;
-            border-radius: 0.5rem !important;
-            padding: 0.75rem 1rem !important;
-            font-size: 1rem !important;
-            line-height: 1.6 !important;
-            transition: none !important;
-        }}
-        .stButton > button[data-testid="baseButton-secondary"]:hover,
-        .stButton > button[data-testid="baseButton-secondary"]:active,
-        .stButton > button[data-testid="baseButton-secondary"]:focus {{
-            background-color: rgba(0, 178, 255, 0.1) !important;
-            border: 1px solid rgba(0, 178, 255, 0.2) !important;
-            color: rgb(0, 104, 181) !important;
-            transform: none !important;
-            box-shadow: none !important;
-        }}
-        </style>
-        """, unsafe_allow_html=True)
-        
-        if st.button(f"ℹ️ {message}", key=f"dismiss_info_{key}", 
-                    type="secondary", use_container_width=True):
-            st.session_state[f"dismissed_{key}"] = True
-            st.rerun()
+        # Stable across worker processes, unlike the PYTHONHASHSEED-salted hash()
+        key = f"{kind}_{hashlib.blake2b(message.encode(), digest_size=8).hexdigest()}"
+    
+    dismissed_key = f"dismissed_{key}"
+    if not st.session_state.setdefault(dismissed_key, False):
+        # Styled by the msg-<kind> rules in the dismissible stylesheet
+        with st.container(key=f"msg-{kind}-{key}"):
+            if st.button(f"{emoji} {message}", key=f"dismiss_{kind}_{key}", 
+                        type="secondary", use_container_width=True):
+                st.session_state[dismissed_key] = True
+                st.rerun()
 
-def dismissible_success(message: str, key: Optional[str] = None) -> None:
-    """Display a dismissible success message - click to dismiss"""
-    if key is None:
-        key = f"success_{hash(message)}"
-    
-    if f"dismissed_{key}" not in st.session_state:
-        st.session_state[f"dismissed_{key}"] = False
-    
-    if not st.session_state[f"dismissed_{key}"]:
-        # Custom CSS for success button styling
-        st.markdown(f"""
-        <style>
-        .stButton > button[data-testid="baseButton-secondary"] {{
-            background-color: rgba(33, 195, 84, 0.1) !important;
-            border: 1px solid rgba(33, 195, 84, 0.2) !important;
-            color: rgb(23, 114, 51) !important;
-            width: 100% !important;
-            text-align: left !important;
-            border-radius: 0.5rem !important;
-            padding: 0.75rem 1rem !important;
-            font-size: 1rem !important;
-            line-height: 1.6 !important;
-            transition: none !important;
-        }}
-        .stButton > button[data-testid="baseButton-secondary"]:hover,
-        .stButton > button[data-testid="baseButton-secondary"]:active,
-        .stButton > button[data-testid="baseButton-secondary"]:focus {{
-            background-color: rgba(33, 195, 84, 0.1) !important;
-            border: 1px solid rgba(33, 195, 84, 0.2) !important;
-            color: rgb(23, 114, 51) !important;
-            transform: none !important;
-            box-shadow: none !important;
-        }}
-        </style>
-        """, unsafe_allow_html=True)
-        
-        if st.button(f"✅ {message}", key=f"dismiss_success_{key}", 
-                    type="secondary", use_container_width=True):
-            st.session_state[f"dismissed_{key}"] = True
-            st.rerun()
+dismissible_error = partial(dismissible, "error")
+dismissible_warning = partial(dismissible, "warning")
+dismissible_info = partial(dismissible, "info")
+dismissible_success = partial(dismissible, "success")
 
 @st.cache_resource
 def init_snowflake_connection():
@@ -526,6 +475,70 @@ def try_secrets_connection():
         st.session_state.secrets_error = f"Error accessing secrets.toml: {str(e)}"
     return False
 
+def _load_private_key_der(pem_bytes: bytes, passphrase: Optional[str]) -> bytes:
+    """Parse a PEM private key and convert it to unencrypted DER PKCS8 for the Snowflake connector"""
+    private_key = serialization.load_pem_private_key(
+        pem_bytes,
+        password=passphrase.encode() if passphrase else None
+    )
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+
+# Connection parameters that prove the caller's identity; only these make a connection safe to share
+_SECRET_CONN_PARAMS = ("password", "private_key", "token")
+
+@st.cache_resource(show_spinner=False, validate=lambda conn: not conn.is_closed())
+def _get_shared_snowflake_connection(**conn_params):
+    """Open a Snowflake connection shared by every session using the same credentials"""
+    return snowflake.connector.connect(**conn_params)
+
+@st.cache_resource(show_spinner=False)
+def _shared_connection_users() -> Tuple[threading.Lock, Dict[int, set]]:
+    """Sessions using each shared connection (by id), so the last one to disconnect can close it"""
+    return threading.Lock(), {}
+
+def open_snowflake_connection(conn_params: Dict[str, Any]):
+    """Open a Snowflake connection, reusing a cached one so the TLS + auth handshake happens once per credential set"""
+    st.session_state.snowflake_conn_shared = any(conn_params.get(param) for param in _SECRET_CONN_PARAMS)
+    if st.session_state.snowflake_conn_shared:
+        # Remember this session's cache entry so Disconnect releases only that one
+        st.session_state.snowflake_conn_params = conn_params
+        session_token = st.session_state.setdefault("snowflake_session_token", uuid.uuid4().hex)
+        lock, users = _shared_connection_users()
+        # Under the lock, so a connection being closed by its last user can't be handed out meanwhile
+        with lock:
+            conn = _get_shared_snowflake_connection(**conn_params)
+            users.setdefault(id(conn), set()).add(session_token)
+        return conn
+    # Browser SSO has no secret in its parameters, so sharing would hand this login to anyone typing the same user
+    return snowflake.connector.connect(**conn_params)
+
+def close_snowflake_connection() -> None:
+    """Release this session's Snowflake connection"""
+    st.session_state.pop("_current_user", None)
+    conn = st.session_state.get("snowflake_conn")
+    if conn is None:
+        return
+    if st.session_state.get("snowflake_conn_shared"):
+        # Other sessions with the same credentials may still be using it; only the last one closes it
+        conn_params = st.session_state.pop("snowflake_conn_params", {})
+        lock, users = _shared_connection_users()
+        with lock:
+            conn_users = users.get(id(conn), set())
+            conn_users.discard(st.session_state.get("snowflake_session_token"))
+            if conn_users:
+                return
+            users.pop(id(conn), None)
+            # Evict only this credential set's entry (clear() without arguments would drop every user's connection)
+            if conn_params:
+                _get_shared_snowflake_connection.clear(**conn_params)
+            conn.close()
+    else:
+        conn.close()
+
 def connect_to_snowflake_with_config(config: Dict[str, str]) -> bool:
     """Connect to Snowflake using configuration dictionary"""
     try:
@@ -562,16 +575,7 @@ def connect_to_snowflake_with_config(config: Dict[str, str]) -> bool:
             
             if private_key_path and os.path.exists(private_key_path):
                 with open(private_key_path, 'rb') as key_file:
-                    private_key = serialization.load_pem_private_key(
-                        key_file.read(),
-                        password=private_key_passphrase.encode() if private_key_passphrase else None
-                    )
-                    pkb = private_key.private_bytes(
-                        encoding=serialization.Encoding.DER,
-                        format=serialization.PrivateFormat.PKCS8,
-                        encryption_algorithm=serialization.NoEncryption()
-                    )
-                    conn_params["private_key"] = pkb
+                    conn_params["private_key"] = _load_private_key_der(key_file.read(), private_key_passphrase)
             else:
                 raise ValueError("Private key file not found or not specified")
         
@@ -583,7 +587,7 @@ def connect_to_snowflake_with_config(config: Dict[str, str]) -> bool:
             conn_params["authenticator"] = authenticator
         
         # Attempt connection
-        conn = snowflake.connector.connect(**conn_params)
+        conn = open_snowflake_connection(conn_params)
         st.session_state.snowflake_conn = conn
         st.session_state.snowflake_connected = True
         return True
@@ -616,16 +620,7 @@ def connect_to_snowflake_manual(account: str, user: str, auth_method: str, **aut
             
             if private_key_content:
                 try:
-                    private_key = serialization.load_pem_private_key(
-                        private_key_content.encode(),
-                        password=private_key_passphrase.encode() if private_key_passphrase else None
-                    )
-                    pkb = private_key.private_bytes(
-                        encoding=serialization.Encoding.DER,
-                        format=serialization.PrivateFormat.PKCS8,
-                        encryption_algorithm=serialization.NoEncryption()
-                    )
-                    conn_params["private_key"] = pkb
+                    conn_params["private_key"] = _load_private_key_der(private_key_content.encode(), private_key_passphrase)
                 except Exception as e:
                     st.error(f"Error processing private key: {str(e)}")
                     return False
@@ -641,7 +636,7 @@ def connect_to_snowflake_manual(account: str, user: str, auth_method: str, **aut
         if auth_params.get("role"):
             conn_params["role"] = auth_params["role"]
         
-        conn = snowflake.connector.connect(**conn_params)
+        conn = open_snowflake_connection(conn_params)
         st.session_state.snowflake_conn = conn
         st.session_state.snowflake_connected = True
         st.session_state.secrets_connected = False  # Mark as manually connected
@@ -655,8 +650,36 @@ def connect_to_snowflake_manual(account: str, user: str, auth_method: str, **aut
 SESSION_DATABASE = "DBT_SOURCE_PROJECT_EVAL"
 SESSION_SCHEMA = "RESULTS"
 
+def get_snowflake_metadata(database: Optional[str], refresh: bool = False) -> Optional[Dict[str, Any]]:
+    """Get the current database/schema and the available databases and schemas in a single round-trip"""
+    # Schemas of the given database, or of the session's current database if none is selected yet
+    schemata = f"{database}.INFORMATION_SCHEMA.SCHEMATA" if database else "INFORMATION_SCHEMA.SCHEMATA"
+    query = f"""
+    SELECT
+        CURRENT_DATABASE() AS CURRENT_DB,
+        CURRENT_SCHEMA() AS CURRENT_SCHEMA,
+        (SELECT ARRAY_AGG(database_name) WITHIN GROUP (ORDER BY database_name) FROM SNOWFLAKE.INFORMATION_SCHEMA.DATABASES) AS DATABASES,
+        (SELECT ARRAY_AGG(schema_name) WITHIN GROUP (ORDER BY schema_name) FROM {schemata}) AS SCHEMAS
+    """
+    df = execute_snowflake_query(query, suppress_errors=True, use_arrow_dtypes=False, refresh=refresh)
+    if df is None or df.empty:
+        return None
+    row = df.iloc[0]
+    # ARRAY columns come back as JSON text
+    return {
+        "current_db": row['CURRENT_DB'],
+        "current_schema": row['CURRENT_SCHEMA'],
+        "databases": json_loads(row['DATABASES']) if row['DATABASES'] else [],
+        "schemas": json_loads(row['SCHEMAS']) if row['SCHEMAS'] else [],
+    }
+
 def get_current_session_info() -> tuple:
     """Get current session database and schema"""
+    metadata = get_snowflake_metadata(None)
+    if metadata is not None:
+        return metadata["current_db"], metadata["current_schema"]
+    
+    # Fall back to a dedicated query so errors are reported
     try:
         query = "SELECT CURRENT_DATABASE() as current_db, CURRENT_SCHEMA() as current_schema"
         df = execute_snowflake_query(query)
@@ -666,8 +689,24 @@ def get_current_session_info() -> tuple:
         st.sidebar.error(f"Error getting session info: {str(e)}")
     return SESSION_DATABASE, SESSION_SCHEMA
 
+def get_current_user() -> Optional[str]:
+    """Get the connected user, queried once per session"""
+    if "_current_user" not in st.session_state:
+        df = execute_snowflake_query("SELECT CURRENT_USER() as current_user")
+        if df is None or df.empty:
+            # Don't remember failures so the next rerun retries
+            return None
+        st.session_state["_current_user"] = df.iloc[0]['CURRENT_USER']
+    return st.session_state["_current_user"]
+
 def get_available_databases() -> list:
     """Get list of available databases"""
+    # Same query (and cache entry) as the schemas of the selected database
+    metadata = get_snowflake_metadata(st.session_state.get('selected_database'))
+    if metadata is not None:
+        return metadata["databases"]
+    
+    # Fall back to a dedicated query so errors are reported
     try:
         query = "SELECT database_name FROM SNOWFLAKE.INFORMATION_SCHEMA.DATABASES ORDER BY database_name"
         df = execute_snowflake_query(query)
@@ -679,6 +718,11 @@ def get_available_databases() -> list:
 
 def get_available_schemas(database: str) -> list:
     """Get list of available schemas for the selected database"""
+    metadata = get_snowflake_metadata(database)
+    if metadata is not None:
+        return metadata["schemas"]
+    
+    # Fall back to a dedicated query so errors are reported
     try:
         query = f"SELECT schema_name FROM {database}.INFORMATION_SCHEMA.SCHEMATA ORDER BY schema_name"
         df = execute_snowflake_query(query)
@@ -690,148 +734,330 @@ def get_available_schemas(database: str) -> list:
 
 # Unified query execution for both environments
 
-def execute_snowflake_query(query: str, suppress_errors: bool = False) -> Optional[pd.DataFrame]:
+@st.cache_data(ttl=600, show_spinner=False)
+def _run_query(query: str, session_id: str, _conn, use_arrow_dtypes: bool = True, cache_bust: str = "") -> pd.DataFrame:
+    """Run a query on a Snowflake connection, cached per Snowflake session and SQL text"""
+    # The connection is unhashable, so it is excluded from the cache key (leading underscore).
+    # Errors are raised rather than returned so failed queries are never cached.
+    # cache_bust only takes part in the key: a new token forces a fresh run of this one query.
+    with _conn.cursor() as cursor:  # Closes the cursor on error paths too
+        cursor.execute(query)
+        if use_arrow_dtypes and PYARROW_AVAILABLE:
+            # Keep Snowflake's Arrow result as pyarrow-backed columns (compact strings and integers
+            # for long-lived frames) instead of converting to NumPy and back
+            table = cursor.fetch_arrow_all(force_return_table=True)
+            return table.to_pandas(types_mapper=pd.ArrowDtype)
+        # Arrow result batches go straight into pandas without per-value Python objects
+        return cursor.fetch_pandas_all()
+
+def get_raw_snowflake_connection():
+    """Get the underlying Snowflake connector connection (supports both local and Snowflake Native)"""
+    if IS_SNOWFLAKE_NATIVE:
+        return st.connection("snowflake").raw_connection
+    return st.session_state.get("snowflake_conn")
+
+def execute_snowflake_query(query: str, suppress_errors: bool = False, use_arrow_dtypes: bool = True,
+                            refresh: bool = False) -> Optional[pd.DataFrame]:
     """Execute a query on Snowflake and return results as DataFrame (supports both local and Snowflake Native)"""
-    # Check if we're in Snowflake Native mode
-    is_snowflake_mode = IS_SNOWFLAKE_NATIVE
+    if not IS_SNOWFLAKE_NATIVE and not st.session_state.get("snowflake_connected"):
+        if not suppress_errors:
+            dismissible_warning("Not connected to Snowflake", key="not_connected_warning")
+        return None
+    
+    # Per-query refresh tokens, so a refresh bypasses the cache for this query only
+    # (clearing _run_query would drop every session's cached results). Tokens must be unique:
+    # the cache is shared by every session on the same Snowflake session id, so a counter could
+    # land on an entry another session stored under the same value earlier
+    refresh_tokens = st.session_state.setdefault("query_refresh_tokens", {})
+    if refresh:
+        refresh_tokens[query] = uuid.uuid4().hex
     
-    if is_snowflake_mode:
-        try:
-            conn = st.connection("snowflake")
-            df = conn.query(query, ttl=600)
-            return df
-        except Exception as e:
-            if not suppress_errors:
-                error_msg = str(e).lower()
-                if "does not exist" in error_msg or "object" in error_msg:
-                    # Extract table name from query for better error message
-                    table_match = re.search(r'FROM\s+([^\s]+)', query, re.IGNORECASE)
-                    table_name = table_match.group(1) if table_match else "table"
-                    
-                    # Use session state to track if we've already shown this error
-                    error_key = f"error_shown_{table_name}"
-                    if error_key not in st.session_state:
-                        st.session_state[error_key] = True
-                        st.error(f"❌ Table not found: `{table_name}` - Please check if you've selected the correct database and schema containing dbt Project Evaluator results.")
-                else:
-                    st.error(f"Query execution failed (Snowflake Native): {str(e)}")
-            return None
-    else:
-        # Local/manual connection
-        if not st.session_state.get("snowflake_connected"):
-            if not suppress_errors:
-                dismissible_warning("Not connected to Snowflake", key="not_connected_warning")
-            return None
-        try:
-            conn = st.session_state.snowflake_conn
-            cursor = conn.cursor()
-            cursor.execute(query)
-            columns = [col[0] for col in cursor.description]
-            results = cursor.fetchall()
-            df = pd.DataFrame(results, columns=columns)
-            cursor.close()
-            return df
-        except Exception as e:
-            if not suppress_errors:
-                error_msg = str(e).lower()
-                if "does not exist" in error_msg or "object" in error_msg:
-                    # Extract table name from query for better error message
-                    table_match = re.search(r'FROM\s+([^\s]+)', query, re.IGNORECASE)
-                    table_name = table_match.group(1) if table_match else "table"
-                    
-                    # Use session state to track if we've already shown this error
-                    error_key = f"error_shown_{table_name}"
-                    if error_key not in st.session_state:
-                        st.session_state[error_key] = True
-                        st.error(f"❌ Table not found: `{table_name}` - Please check if you've selected the correct database and schema containing dbt Project Evaluator results.")
-                else:
-                    st.error(f"Query execution failed: {str(e)}")
-            return None
-            return None
+    try:
+        # Same code path for both environments: one connector connection, cached results per session
+        conn = get_raw_snowflake_connection()
+        return _run_query(query, str(conn.session_id), conn, use_arrow_dtypes, refresh_tokens.get(query, ""))
+    except Exception as e:
+        if not suppress_errors:
+            error_msg = str(e).lower()
+            if "does not exist" in error_msg or "object" in error_msg:
+                # Extract table name from query for better error message
+                table_match = re.search(r'FROM\s+([^\s]+)', query, re.IGNORECASE)
+                table_name = table_match.group(1) if table_match else "table"
+                
+                # Use session state to track if we've already shown this error
+                errors_shown = st.session_state.setdefault("missing_tables_reported", set())
+                if table_name not in errors_shown:
+                    errors_shown.add(table_name)
+                    st.error(f"❌ Table not found: `{table_name}` - Please check if you've selected the correct database and schema containing dbt Project Evaluator results.")
+            else:
+                environment = " (Snowflake Native)" if IS_SNOWFLAKE_NATIVE else ""
+                st.error(f"Query execution failed{environment}: {str(e)}")
+        return None
+
+def execute_snowflake_scalar(query: str, suppress_errors: bool = False, refresh: bool = False) -> Optional[Any]:
+    """Execute a single-value query (e.g. COUNT(*)) and return the first column of the first row"""
+    # Single values don't benefit from Arrow dtypes; keep plain NumPy scalars
+    df = execute_snowflake_query(query, suppress_errors=suppress_errors, use_arrow_dtypes=False, refresh=refresh)
+    if df is None or df.empty:
+        return None
+    return df.iloc[0, 0]
+
+def _count_table_rows(conn, table: str) -> int:
+    """Count the rows of a table on a dedicated cursor (safe to run from worker threads)"""
+    # Cursors are not thread-safe, so each call opens its own
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
 
 # Helper to build fully qualified table name
 
+# Rule keys double as table names, so only plain SQL identifiers may be interpolated into queries
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+def is_valid_identifier(name: str) -> bool:
+    """Check that a name is a plain (unquoted) SQL identifier"""
+    return _IDENTIFIER_RE.fullmatch(name) is not None
+
+@lru_cache(maxsize=1024)
+def _qualify_table(database: str, schema: str, table: str) -> str:
+    """Validate and qualify a table name (memoized; keyed on database and schema, so no invalidation is needed)"""
+    if not is_valid_identifier(table):
+        raise ValueError(f"Invalid table name: {table!r}")
+    # Unquoted identifiers are case-insensitive; upper-casing keeps the query text (and cache keys) stable
+    return f"{database}.{schema}.{table.upper()}"
+
 def fq_table(table: str) -> str:
     """Build fully qualified table name using session state database and schema"""
     current_db = st.session_state.get('selected_database', SESSION_DATABASE)
     current_schema = st.session_state.get('selected_schema', SESSION_SCHEMA)
-    return f"{current_db}.{current_schema}.{table}"
+    return _qualify_table(current_db, current_schema, table)
+
+def get_schema_tables(refresh: bool = False) -> Optional[set]:
+    """Return the tables and views in the selected schema (upper-cased names), or None if unknown (refresh bypasses the query cache)"""
+    current_db = st.session_state.get('selected_database', SESSION_DATABASE)
+    current_schema = st.session_state.get('selected_schema', SESSION_SCHEMA)
+    # The SQL only depends on the schema, so every caller shares one cached result per schema
+    query = f"""
+    SELECT TABLE_NAME
+    FROM {current_db}.INFORMATION_SCHEMA.TABLES
+    WHERE TABLE_SCHEMA = '{current_schema}'
+    """
+    df = execute_snowflake_query(query, suppress_errors=True, use_arrow_dtypes=False, refresh=refresh)
+    if df is None:
+        return None
+    return set(df['TABLE_NAME'])
+
+def _get_violations(rule_key: str) -> Optional[pd.DataFrame]:
+    """Get the cached violations DataFrame for a rule"""
+    return st.session_state.setdefault("violations", {}).get(rule_key)
+
+def df_fingerprint(df: pd.DataFrame) -> Tuple[Any, ...]:
+    """Cheap fingerprint of a DataFrame's shape, columns, dtypes and ordered content (vectorised row hashes, no CSV/pickle serialization)"""
+    # Digest the row hashes in order (a sum would ignore row order); names and dtypes aren't part of the row hashes
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return (
+        df.shape,
+        tuple(df.columns),
+        tuple(map(str, df.dtypes)),
+        hashlib.blake2b(row_hashes.tobytes(), digest_size=16).hexdigest(),
+    )
+
+def _set_violations(rule_key: str, df: pd.DataFrame, violation_count: Optional[int] = None) -> None:
+    """Cache the violations DataFrame (and its total count, by default its row count) for a rule"""
+    violation_hashes = st.session_state.setdefault("violation_hashes", {})
+    fingerprint = df_fingerprint(df)
+    if violation_hashes.get(rule_key) == fingerprint and _get_violations(rule_key) is not None:
+        # Snowflake returned the same rows - keep the cached frame and everything derived from it,
+        # unless the total behind a truncated frame moved
+        if violation_count is not None and get_violation_count(rule_key) != violation_count:
+            _set_violation_count(rule_key, violation_count)
+        return
+    violation_hashes[rule_key] = fingerprint
+    st.session_state.setdefault("violations", {})[rule_key] = df
+    _set_violation_count(rule_key, len(df) if violation_count is None else violation_count)
+
+def _set_violation_count(rule_key: str, count: int) -> None:
+    """Cache the violations count for a rule"""
+    st.session_state.setdefault("violation_counts", {})[rule_key] = count
+    _bump_violations_version()
+
+def _bump_violations_version() -> None:
+    """Invalidate anything derived from the cached violations (e.g. dashboard metrics)"""
+    st.session_state["violations_version"] = st.session_state.get("violations_version", 0) + 1
+
+def get_violation_count(rule_key: str) -> Optional[int]:
+    """Get the cached violations count for a rule, or None if it hasn't been loaded yet"""
+    violation_counts = st.session_state.get("violation_counts", {})
+    if rule_key in violation_counts:
+        return violation_counts[rule_key]
+    
+    # Fall back to the row-level data if it was loaded by the rule viewer
+    df = _get_violations(rule_key)
+    if df is not None:
+        return len(df)
+    return None
+
+# Violation rows kept per rule in session state; totals come from COUNT(*), not from the rows
+VIOLATION_ROW_LIMIT = 1000
+
+def violations_query(rule_key: str, limit: Optional[int]) -> str:
+    """SQL selecting a rule's violation rows (up to limit, None for all)"""
+    table = fq_table(rule_key)
+    return f"SELECT * FROM {table}" if limit is None else f"SELECT * FROM {table} LIMIT {limit}"
+
+def get_violations_df(rule_key: str, refresh: bool = False, limit: Optional[int] = VIOLATION_ROW_LIMIT) -> Optional[pd.DataFrame]:
+    """Lazily load the violations rows for a rule (up to limit, None for all), caching them in session state"""
+    if refresh or _get_violations(rule_key) is None:
+        # Rules whose full table was loaded ("Load all") stay complete when refreshed
+        full_tables = st.session_state.setdefault("violations_full", set())
+        if refresh and rule_key in full_tables:
+            limit = None
+        table = fq_table(rule_key)
+        df = execute_snowflake_query(violations_query(rule_key, limit), refresh=refresh)
+        if df is not None:
+            violation_count = len(df)
+            if limit is not None and violation_count >= limit:
+                # Truncated - get the real total from Snowflake
+                total = execute_snowflake_scalar(f"SELECT COUNT(*) FROM {table}", suppress_errors=True, refresh=refresh)
+                if total is not None:
+                    violation_count = int(total)
+            if limit is None:
+                full_tables.add(rule_key)
+            else:
+                full_tables.discard(rule_key)
+            _set_violations(rule_key, df, violation_count)
+    return _get_violations(rule_key)
 
 def get_rule_status_emoji(rule_key: str, rule_name: str) -> str:
     """Get emoji and title based on violations count"""
     if not (st.session_state.get("snowflake_connected") or IS_SNOWFLAKE_NATIVE):
         return f"🔍 {rule_name}"
     
-    # Check if violations data is already loaded
-    violations_key = f"violations_{rule_key}"
-    if violations_key in st.session_state:
-        df = st.session_state[violations_key]
-        if df.empty:
-            return f"✅ {rule_name}"
-        else:
-            violation_count = len(df)
-            return f"❌ {rule_name} ({violation_count})"
-    else:
-        # Try to load violations data quickly
+    violation_count = get_violation_count(rule_key)
+    failed_counts = st.session_state.setdefault("violation_count_failures", set())
+    if violation_count is None and rule_key not in failed_counts:
+        existing_tables = get_schema_tables()
+        if existing_tables is not None and rule_key.upper() not in existing_tables:
+            # Known to be missing - no point sending a query that will fail
+            failed_counts.add(rule_key)
+            return f"🔍 {rule_name}"
+        # Try to load the violations count quickly
         try:
-            query = f"SELECT * FROM {fq_table(rule_key)}"
-            df = execute_snowflake_query(query)
-            if df is not None:
-                st.session_state[violations_key] = df
-                if df.empty:
-                    return f"✅ {rule_name}"
-                else:
-                    violation_count = len(df)
-                    return f"❌ {rule_name} ({violation_count})"
+            violation_count = execute_snowflake_scalar(f"SELECT COUNT(*) FROM {fq_table(rule_key)}")
+            if violation_count is not None:
+                violation_count = int(violation_count)
+                _set_violation_count(rule_key, violation_count)
         except:
             pass
+        if violation_count is None:
+            # Failed queries aren't cached, so remember the failure instead of retrying on every rerun
+            failed_counts.add(rule_key)
     
-    # Default fallback
-    return f"🔍 {rule_name}"
+    if violation_count is None:
+        # Default fallback
+        return f"🔍 {rule_name}"
+    if violation_count == 0:
+        return f"✅ {rule_name}"
+    return f"❌ {rule_name} ({violation_count})"
 
-def preload_violations_for_rules(rules_data: Dict[str, Any]):
-    """Preload violations data for all rules if connected to Snowflake"""
+def _run_violation_count_batch(rule_tables: Dict[str, str], refresh: bool = False) -> Optional[pd.DataFrame]:
+    """Count the rows of every rule table in one UNION ALL query"""
+    batch_parts = [
+        f"SELECT '{rule_key}' AS RULE_KEY, COUNT(*) AS N FROM {table}"
+        for rule_key, table in rule_tables.items()
+    ]
+    # The result is one small row per rule, so skip the Arrow dtype conversion
+    return execute_snowflake_query("\nUNION ALL\n".join(batch_parts), suppress_errors=True, use_arrow_dtypes=False, refresh=refresh)
+
+def preload_violations_for_rules(rules_data: Dict[str, Any], refresh: bool = False):
+    """Preload violations counts for all rules in a single batched query if connected to Snowflake (refresh bypasses the query cache)"""
     if not (st.session_state.get("snowflake_connected") or IS_SNOWFLAKE_NATIVE):
         return
     
     # Only preload if not already done in this session
-    if st.session_state.get("violations_preloaded"):
+    if st.session_state.get("violations_preloaded") and not refresh:
         return
     
+    # Resolve the table of every pending rule in a single pass, skipping rules whose counts
+    # are already loaded and rule keys that aren't valid table names
+    rule_tables = {
+        rule_key: fq_table(rule_key)
+        for category_data in rules_data.values()
+        for rule_key in category_data.get("rules", {})
+        if get_violation_count(rule_key) is None and is_valid_identifier(rule_key)
+    }
+    
     with st.spinner("Loading violations data for all rules..."):
-        total_rules = 0
-        loaded_rules = 0
-        
-        # Count total rules
-        for category_data in rules_data.values():
-            total_rules += len(category_data.get("rules", {}))
-        
-        # Create progress bar
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        
-        for category_name, category_data in rules_data.items():
-            rules = category_data.get("rules", {})
-            for rule_key, rule_data in rules.items():
-                status_text.text(f"Loading violations for {rule_key}...")
-                
-                # Skip if already loaded
-                if f"violations_{rule_key}" not in st.session_state:
-                    query = f"SELECT * FROM {fq_table(rule_key)}"
-                    df = execute_snowflake_query(query)
-                    if df is not None:
-                        st.session_state[f"violations_{rule_key}"] = df
-                
-                loaded_rules += 1
-                progress_bar.progress(loaded_rules / total_rules)
+        df = None
+        if rule_tables:
+            # One round-trip for all rules instead of one query per rule
+            df = _run_violation_count_batch(rule_tables, refresh)
+            if df is None:
+                # A single missing table fails the whole UNION ALL, so look up which tables exist
+                # (one metadata query) and retry the batch without the missing ones
+                # On refresh, re-read the listing too so tables created by a new dbt run are found
+                existing_tables = get_schema_tables(refresh)
+                if existing_tables is not None:
+                    failed_counts = st.session_state.setdefault("violation_count_failures", set())
+                    for rule_key in [key for key in rule_tables if key.upper() not in existing_tables]:
+                        failed_counts.add(rule_key)
+                        del rule_tables[rule_key]
+                    if rule_tables:
+                        df = _run_violation_count_batch(rule_tables, refresh)
+        total_rules = len(rule_tables)
+        
+        if df is not None:
+            for rule_key, violation_count in zip(df['RULE_KEY'], df['N']):
+                _set_violation_count(rule_key, int(violation_count))
+        elif rule_tables:
+            # The batch still failed (e.g. no access to INFORMATION_SCHEMA), so fall back to
+            # per-rule counts, run concurrently since each one is a network round-trip
+            progress_bar = st.progress(0)
+            status_text = st.empty()
+            
+            conn = get_raw_snowflake_connection()
+            
+            with ThreadPoolExecutor(max_workers=min(16, total_rules)) as executor:
+                futures = {
+                    executor.submit(_count_table_rows, conn, table): rule_key
+                    for rule_key, table in rule_tables.items()
+                }
+                # Session state is only written from the main thread
+                for loaded_rules, future in enumerate(as_completed(futures), 1):
+                    rule_key = futures[future]
+                    status_text.text(f"Loading violations for {rule_key}...")
+                    try:
+                        _set_violation_count(rule_key, int(future.result()))
+                    except Exception:
+                        # Rule table missing in this schema - leave the count unloaded
+                        pass
+                    progress_bar.progress(loaded_rules / total_rules)
+            
+            status_text.empty()
+            progress_bar.empty()
         
         st.session_state["violations_preloaded"] = True
-        status_text.empty()
-        progress_bar.empty()
         # dismissible_success(f"Loaded violations data for {total_rules} rules!")
 
 def calculate_dashboard_metrics(rules_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Calculate metrics for the dashboard overview"""
+    """Calculate metrics for the dashboard overview, reusing the last result until rules or violations change"""
+    connected = bool(st.session_state.get("snowflake_connected") or IS_SNOWFLAKE_NATIVE)
+    
+    # Metrics depend on this session's violation counts, so memoize them per session instead of in st.cache_data
+    cache_key = (connected, _rules_file_version(), st.session_state.get("violations_version", 0), len(rules_data))
+    cached = st.session_state.get("dashboard_metrics")
+    if cached is not None and cached[0] == cache_key:
+        return cached[1]
+    
+    metrics = _compute_dashboard_metrics(rules_data, connected)
+    st.session_state["dashboard_metrics"] = (cache_key, metrics)
+    return metrics
+
+def _compute_dashboard_metrics(rules_data: Dict[str, Any], connected: bool) -> Dict[str, Any]:
+    """Walk all categories and rules to build the dashboard metrics"""
     metrics = {
         "total_rules": 0,
         "categories": len(rules_data),
@@ -841,7 +1067,7 @@ def calculate_dashboard_metrics(rules_data: Dict[str, Any]) -> Dict[str, Any]:
         "violation_details": {}
     }
     
-    if not (st.session_state.get("snowflake_connected") or IS_SNOWFLAKE_NATIVE):
+    if not connected:
         return metrics
     
     # Calculate totals
@@ -851,22 +1077,19 @@ def calculate_dashboard_metrics(rules_data: Dict[str, Any]) -> Dict[str, Any]:
         category_violations = 0
         
         for rule_key, rule_data in rules.items():
-            violations_key = f"violations_{rule_key}"
-            if violations_key in st.session_state:
-                df = st.session_state[violations_key]
-                violation_count = len(df) if not df.empty else 0
+            violation_count = get_violation_count(rule_key) or 0
+            
+            if violation_count > 0:
+                metrics["rules_with_violations"] += 1
+                metrics["total_violations"] += violation_count
+                category_violations += violation_count
                 
-                if violation_count > 0:
-                    metrics["rules_with_violations"] += 1
-                    metrics["total_violations"] += violation_count
-                    category_violations += violation_count
-                    
-                    # Store detailed violation info
-                    metrics["violation_details"][rule_key] = {
-                        "name": rule_data.get("name", rule_key),
-                        "category": category_name,
-                        "count": violation_count
-                    }
+                # Store detailed violation info
+                metrics["violation_details"][rule_key] = {
+                    "name": rule_data.get("name", rule_key),
+                    "category": category_name,
+                    "count": violation_count
+                }
         
         metrics["category_violations"][category_name] = category_violations
     
@@ -898,18 +1121,231 @@ def validate_database_connection() -> bool:
 def clear_all_cached_data():
     """Clear all cached violations data and related session state"""
     # Clear violations cache
-    keys_to_remove = [key for key in st.session_state.keys() if isinstance(key, str) and key.startswith('violations_')]
-    for key in keys_to_remove:
-        del st.session_state[key]
+    st.session_state.pop("violations", None)
+    st.session_state.pop("violation_counts", None)
+    st.session_state.pop("violation_hashes", None)
+    st.session_state.pop("violations_full", None)
+    st.session_state.pop("violation_count_failures", None)
+    _bump_violations_version()
     
     # Clear error tracking
-    error_keys = [key for key in st.session_state.keys() if isinstance(key, str) and key.startswith('error_shown_')]
-    for key in error_keys:
-        del st.session_state[key]
+    st.session_state.pop("missing_tables_reported", None)
     
     # Reset preload flag
     st.session_state["violations_preloaded"] = False
 
+# Coverage column published by dbt Project Evaluator for each coverage table
+COVERAGE_COLUMNS = {
+    'FCT_DOCUMENTATION_COVERAGE': 'DOCUMENTATION_COVERAGE_PCT',
+    'FCT_TEST_COVERAGE': 'TEST_COVERAGE_PCT',
+}
+
+# Matches coverage-like column names in the dbt Project Evaluator coverage tables
+_COVERAGE_COL_RE = re.compile(r"COVERAGE|PCT|PERCENT", re.IGNORECASE)
+
+def resolve_coverage_columns() -> Dict[str, Optional[str]]:
+    """Resolve the coverage column of each coverage table from INFORMATION_SCHEMA"""
+    current_db = st.session_state.get('selected_database', SESSION_DATABASE)
+    current_schema = st.session_state.get('selected_schema', SESSION_SCHEMA)
+    table_list = ", ".join(f"'{table}'" for table in COVERAGE_COLUMNS)
+    query = f"""
+    SELECT TABLE_NAME, COLUMN_NAME
+    FROM {current_db}.INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = '{current_schema}' AND TABLE_NAME IN ({table_list})
+    ORDER BY TABLE_NAME, ORDINAL_POSITION
+    """
+    resolved = {table: None for table in COVERAGE_COLUMNS}
+    # Plain object columns: the compiled (case-insensitive) pattern below isn't supported on Arrow strings
+    df = execute_snowflake_query(query, suppress_errors=True, use_arrow_dtypes=False)
+    if df is None or df.empty:
+        return resolved
+    
+    # Match every column name against the pattern in one vectorized pass
+    df['IS_COVERAGE'] = df['COLUMN_NAME'].str.contains(_COVERAGE_COL_RE)
+    for table, table_df in df.groupby('TABLE_NAME', sort=False):
+        if (table_df['COLUMN_NAME'] == COVERAGE_COLUMNS[table]).any():
+            resolved[table] = COVERAGE_COLUMNS[table]
+        else:
+            candidates = table_df.loc[table_df['IS_COVERAGE'], 'COLUMN_NAME']
+            resolved[table] = candidates.iloc[0] if not candidates.empty else None
+    return resolved
+
+def _coverage_expr(table: str, column: Optional[str]) -> str:
+    """Build a subquery returning the latest coverage of a table as a 0-100 percentage"""
+    if not column:
+        return "NULL"
+    # Fractions (<= 1) are scaled to percentages server-side
+    return (
+        f"(SELECT CASE WHEN {column} <= 1 THEN {column} * 100 ELSE {column} END::FLOAT "
+        f"FROM {fq_table(table)} ORDER BY MEASURED_AT DESC LIMIT 1)"
+    )
+
+def _kpi_query(coverage_columns: Dict[str, Optional[str]]) -> str:
+    """Build a single query returning the latest value of each coverage column and the model count"""
+    doc_expr = _coverage_expr('FCT_DOCUMENTATION_COVERAGE', coverage_columns['FCT_DOCUMENTATION_COVERAGE'])
+    test_expr = _coverage_expr('FCT_TEST_COVERAGE', coverage_columns['FCT_TEST_COVERAGE'])
+    models_expr = f"(SELECT COUNT(1) FROM {fq_table('INT_ALL_GRAPH_RESOURCES')} WHERE resource_type = 'model')"
+    return f"SELECT {doc_expr} AS DOC_COVERAGE, {test_expr} AS TEST_COVERAGE, {models_expr} AS MODELS"
+
+def get_kpi_scalars() -> Tuple[Optional[float], Optional[float], Optional[int]]:
+    """Get the latest documentation and test coverage percentages and the model count in a single round-trip"""
+    try:
+        df = execute_snowflake_query(_kpi_query(COVERAGE_COLUMNS), suppress_errors=True, use_arrow_dtypes=False)
+        if df is None:
+            # Column names differ in this dbt Project Evaluator version - look them up and retry
+            df = execute_snowflake_query(_kpi_query(resolve_coverage_columns()), suppress_errors=True, use_arrow_dtypes=False)
+        if df is not None and not df.empty:
+            doc_coverage, test_coverage, total_models = (None if pd.isna(value) else value for value in df.iloc[0][['DOC_COVERAGE', 'TEST_COVERAGE', 'MODELS']])
+            return (
+                None if doc_coverage is None else float(doc_coverage),
+                None if test_coverage is None else float(test_coverage),
+                None if total_models is None else int(total_models),
+            )
+    except Exception:
+        pass
+    return None, None, None
+
+@st.cache_resource(show_spinner=False)
+def build_coverage_doughnut(title: str, covered_label: str, uncovered_label: str, coverage: Optional[float]) -> go.Figure:
+    """Build a doughnut chart for a coverage percentage (cached, figures only depend on the arguments)"""
+    if coverage is None:
+        coverage = 0
+        status = "No Data"
+    else:
+        status = "Good" if coverage > 80 else "Needs Improvement"
+    color = "#2e7d32" if coverage > 80 else "#c62828"
+    
+    fig = go.Figure(data=[go.Pie(
+        labels=[covered_label, uncovered_label], 
+        values=[coverage, 100-coverage],
+        hole=.6,
+        # Keep the covered slice first, starting from the top
+        sort=False,
+        direction='clockwise',
+        marker_colors=[color, '#f0f0f0'],
+        textinfo='none',
+        hovertemplate='%{label}: %{value:.1f}%<extra></extra>'
+    )])
+    
+    fig.update_layout(
+        title={
+            'text': f"<b>{title}</b>",
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        showlegend=False,
+        height=320,
+        margin=dict(t=60, b=80, l=20, r=20),
+        annotations=[
+            # Center percentage text
+            dict(
+                text=f"<b style='font-size:24px; color:{color}'>{coverage:.1f}%</b>",
+                x=0.5, y=0.5,
+                xref="paper", yref="paper",
+                showarrow=False,
+                font=dict(size=24, color=color)
+            ),
+            # Bottom status text - moved lower to avoid overlap
+            dict(
+                text=f"<span style='font-size:12px; color:#666'>{status}</span>",
+                x=0.5, y=-0.15,
+                xref="paper", yref="paper",
+                showarrow=False,
+                font=dict(size=12, color="#666")
+            )
+        ]
+    )
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def build_violations_bar(rows: Tuple[Tuple[str, str, int], ...]) -> go.Figure:
+    """Build the stacked horizontal bar of violations per category, one trace per rule (cached on the rows)"""
+    fig = go.Figure()
+    for category, rule_name, violations in rows:
+        fig.add_bar(
+            x=[violations],
+            y=[category],
+            name=rule_name,
+            orientation='h',
+            hovertemplate=f"Rule={rule_name}<br>Number of Violations=%{{x}}<br>Category=%{{y}}<extra></extra>"
+        )
+    
+    fig.update_layout(
+        barmode='stack',
+        title="Violations by Category and Rule",
+        height=400,
+        showlegend=True,
+        legend=dict(
+            orientation="v",
+            yanchor="top",
+            y=1,
+            xanchor="left",
+            x=1.02
+        ),
+        margin=dict(l=20, r=150, t=50, b=20),
+        xaxis_title="Number of Violations",
+        yaxis_title="Category"
+    )
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def build_model_type_pie(type_counts: Tuple[Tuple[str, int], ...]) -> go.Figure:
+    """Build the model type distribution pie chart (cached on the (model type, count) pairs)"""
+    fig = go.Figure(go.Pie(
+        labels=[model_type for model_type, _ in type_counts],
+        values=[count for _, count in type_counts],
+        name="Model Types"
+    ))
+    fig.update_layout(title="Model Type Distribution", showlegend=True)
+    return fig
+
+@st.fragment
+def display_project_structure_breakdown() -> None:
+    """Display the model type distribution; reruns on its own so unrelated widgets don't refetch the models"""
+    st.subheader("Project Structure Breakdown")
+    st.markdown("**Distribution of Model Types**")
+
+    # Pie chart: count per model_type, aggregated server-side
+    model_type_query = f"""
+    SELECT model_type, COUNT(*) AS models
+    FROM {fq_table('INT_ALL_GRAPH_RESOURCES')}
+    WHERE resource_type = 'model'
+    GROUP BY model_type
+    """
+    type_counts_df = None
+    try:
+        type_counts_df = execute_snowflake_query(model_type_query)
+    except Exception as e:
+        st.error(f"Error loading model types: {str(e)}")
+
+    if type_counts_df is None or type_counts_df.empty:
+        st.info("No model type data available.")
+        return
+    
+    st.plotly_chart(
+        build_model_type_pie(tuple(
+            (model_type, int(count))
+            for model_type, count in zip(type_counts_df['MODEL_TYPE'], type_counts_df['MODELS'])
+        )),
+        use_container_width=True
+    )
+
+    # Full model details are only fetched on request
+    with st.expander("Show all model details"):
+        if st.toggle("Load model details", key="show_model_details"):
+            models_query = f"""
+            SELECT model_type, database, REPLACE(schema, 'RESULTS_') AS schema, materialized, directory_path, file_name, number_lines, sql_complexity
+            FROM {fq_table('INT_ALL_GRAPH_RESOURCES')}
+            WHERE resource_type = 'model'
+            """
+            try:
+                models_df = execute_snowflake_query(models_query)
+                if models_df is not None:
+                    models_df.columns = [col.lower() for col in models_df.columns]
+                    st.dataframe(models_df, use_container_width=True, hide_index=True)
+            except Exception as e:
+                st.error(f"Error loading model details: {str(e)}")
+
 def display_dashboard_overview(rules_data: Dict[str, Any]) -> None:
     """Display the overview dashboard similar to the provided image"""
     st.markdown('<div class="header-wrapper"><h1 class="main-header">📊 Project Health Overview</h1></div>', unsafe_allow_html=True)
@@ -933,310 +1369,72 @@ def display_dashboard_overview(rules_data: Dict[str, Any]) -> None:
     
     # Project Health Overview Cards
     
-    col1, col2, col3 = st.columns(3)
+    # Spacing below the row comes from the .st-key-kpi-row rule in the global CSS
+    col1, col2, col3 = st.container(key="kpi-row").columns(3)
+    
+    # Documentation coverage, test coverage and model count - get real data from Snowflake in a single query
+    doc_coverage, test_coverage, total_models = get_kpi_scalars()
     
     with col1:
-        # Documentation Coverage - get real data from Snowflake and display as doughnut chart
-        doc_coverage = 0
-        doc_status = "No Data"
-        try:
-            doc_query = f"SELECT * FROM {fq_table('FCT_DOCUMENTATION_COVERAGE')} ORDER BY MEASURED_AT DESC LIMIT 1"
-            doc_df = execute_snowflake_query(doc_query, suppress_errors=True)
-            if doc_df is not None and not doc_df.empty:
-                # Assuming the coverage is in a column - adjust column name as needed
-                coverage_columns = [col for col in doc_df.columns if 'COVERAGE' in col.upper() or 'PCT' in col.upper() or 'PERCENT' in col.upper()]
-                if coverage_columns:
-                    doc_coverage = float(doc_df[coverage_columns[0]].iloc[0]) * 100 if doc_df[coverage_columns[0]].iloc[0] <= 1 else float(doc_df[coverage_columns[0]].iloc[0])
-                elif 'DOCUMENTATION_COVERAGE_PCT' in doc_df.columns:
-                    doc_coverage = float(doc_df['DOCUMENTATION_COVERAGE_PCT'].iloc[0])
-                else:
-                    # Try to find any numeric column that might be coverage
-                    numeric_cols = doc_df.select_dtypes(include=['number']).columns
-                    if len(numeric_cols) > 0:
-                        doc_coverage = float(doc_df[numeric_cols[0]].iloc[0]) * 100 if doc_df[numeric_cols[0]].iloc[0] <= 1 else float(doc_df[numeric_cols[0]].iloc[0])
-                doc_status = "Good" if doc_coverage > 80 else "Needs Improvement"
-            else:
-                doc_coverage = 0
-                doc_status = "No Data"
-        except Exception as e:
-            doc_coverage = 0
-            doc_status = "No Data"
-        
-        # Create doughnut chart for documentation coverage
-        doc_color = "#2e7d32" if doc_coverage > 80 else "#c62828"
-        
-        fig_doc = go.Figure(data=[go.Pie(
-            labels=['Documented', 'Not Documented'], 
-            values=[doc_coverage, 100-doc_coverage],
-            hole=.6,
-            marker_colors=[doc_color, '#f0f0f0'],
-            textinfo='none',
-            hovertemplate='%{label}: %{value:.1f}%<extra></extra>'
-        )])
-        
-        fig_doc.update_layout(
-            title={
-                'text': f"<b>Documentation Coverage</b>",
-                'x': 0.5,
-                'xanchor': 'center'
-            },
-            showlegend=False,
-            height=320,
-            margin=dict(t=60, b=80, l=20, r=20),
-            annotations=[
-                # Center percentage text
-                dict(
-                    text=f"<b style='font-size:24px; color:{doc_color}'>{doc_coverage:.1f}%</b>",
-                    x=0.5, y=0.5,
-                    xref="paper", yref="paper",
-                    showarrow=False,
-                    font=dict(size=24, color=doc_color)
-                ),
-                # Bottom status text - moved lower to avoid overlap
-                dict(
-                    text=f"<span style='font-size:12px; color:#666'>{doc_status}</span>",
-                    x=0.5, y=-0.15,
-                    xref="paper", yref="paper",
-                    showarrow=False,
-                    font=dict(size=12, color="#666")
-                )
-            ]
+        st.plotly_chart(
+            build_coverage_doughnut("Documentation Coverage", "Documented", "Not Documented", doc_coverage),
+            use_container_width=True
         )
-        
-        st.plotly_chart(fig_doc, use_container_width=True)
     
     with col2:
-        # Test Coverage - get real data from Snowflake and display as doughnut chart
-        test_coverage = 0
-        test_status = "No Data"
-        try:
-            test_query = f"SELECT * FROM {fq_table('FCT_TEST_COVERAGE')} ORDER BY MEASURED_AT DESC LIMIT 1"
-            test_df = execute_snowflake_query(test_query, suppress_errors=True)
-            if test_df is not None and not test_df.empty:
-                # Look for coverage columns
-                coverage_columns = [col for col in test_df.columns if 'COVERAGE' in col.upper() or 'PCT' in col.upper() or 'PERCENT' in col.upper()]
-                if coverage_columns:
-                    test_coverage = float(test_df[coverage_columns[0]].iloc[0]) * 100 if test_df[coverage_columns[0]].iloc[0] <= 1 else float(test_df[coverage_columns[0]].iloc[0])
-                elif 'TEST_COVERAGE_PCT' in test_df.columns:
-                    test_coverage = float(test_df['TEST_COVERAGE_PCT'].iloc[0])
-                else:
-                    # Try to find any numeric column that might be coverage
-                    numeric_cols = test_df.select_dtypes(include=['number']).columns
-                    if len(numeric_cols) > 0:
-                        test_coverage = float(test_df[numeric_cols[0]].iloc[0]) * 100 if test_df[numeric_cols[0]].iloc[0] <= 1 else float(test_df[numeric_cols[0]].iloc[0])
-                test_status = "Good" if test_coverage > 80 else "Needs Improvement"
-            else:
-                test_coverage = 0
-                test_status = "No Data"
-        except Exception as e:
-            test_coverage = 0
-            test_status = "No Data"
-        
-        # Create doughnut chart for test coverage
-        test_color = "#2e7d32" if test_coverage > 80 else "#c62828"
-        
-        fig_test = go.Figure(data=[go.Pie(
-            labels=['Tested', 'Not Tested'], 
-            values=[test_coverage, 100-test_coverage],
-            hole=.6,
-            marker_colors=[test_color, '#f0f0f0'],
-            textinfo='none',
-            hovertemplate='%{label}: %{value:.1f}%<extra></extra>'
-        )])
-        
-        fig_test.update_layout(
-            title={
-                'text': f"<b>Test Coverage</b>",
-                'x': 0.5,
-                'xanchor': 'center'
-            },
-            showlegend=False,
-            height=320,
-            margin=dict(t=60, b=80, l=20, r=20),
-            annotations=[
-                # Center percentage text
-                dict(
-                    text=f"<b style='font-size:24px; color:{test_color}'>{test_coverage:.1f}%</b>",
-                    x=0.5, y=0.5,
-                    xref="paper", yref="paper",
-                    showarrow=False,
-                    font=dict(size=24, color=test_color)
-                ),
-                # Bottom status text - moved lower to avoid overlap
-                dict(
-                    text=f"<span style='font-size:12px; color:#666'>{test_status}</span>",
-                    x=0.5, y=-0.15,
-                    xref="paper", yref="paper",
-                    showarrow=False,
-                    font=dict(size=12, color="#666")
-                )
-            ]
+        st.plotly_chart(
+            build_coverage_doughnut("Test Coverage", "Tested", "Not Tested", test_coverage),
+            use_container_width=True
         )
-        
-        st.plotly_chart(fig_test, use_container_width=True)
     
     with col3:
-        # Total Models - get real data from Snowflake
-        total_models = 0
-        model_status = "No Data"
-        try:
-            models_query = f"SELECT COUNT(1) AS models FROM {fq_table('INT_ALL_GRAPH_RESOURCES')} WHERE resource_type = 'model'"
-            models_df = execute_snowflake_query(models_query, suppress_errors=True)
-            if models_df is not None and models_df.empty == False:
-                total_models = int(models_df['MODELS'].iloc[0])
-                if total_models > 100:
-                    model_status = "Large project"
-                elif total_models > 50:
-                    model_status = "Medium project"
-                else:
-                    model_status = "Small project"
-        except Exception as e:
-            total_models = metrics['total_rules']  # Fallback to rule count
+        # Total Models - counted by the KPI query above
+        if total_models is None:
+            total_models = 0
+            model_status = "No Data"
+        elif total_models > 100:
             model_status = "Large project"
+        elif total_models > 50:
+            model_status = "Medium project"
+        else:
+            model_status = "Small project"
         
-        st.markdown(f"""
-        <div style="background-color: #e3f2fd; border: 1px solid #bbdefb; border-radius: 8px; padding: 16px; text-align: center; height: 200px; display: flex; flex-direction: column; justify-content: center;">
-            <div style="color: #1565c0; font-size: 12px; font-weight: bold; margin-bottom: 8px;">Total Models</div>
-            <div style="color: #1565c0; font-size: 24px; font-weight: bold;">{total_models}</div>
-            <div style="color: #666; font-size: 12px;">{model_status}</div>
-            <div style="color: #1565c0; font-size: 24px; margin-top: 8px;">📊</div>
-        </div>
-        """, unsafe_allow_html=True)
+        with st.container(border=True):
+            st.metric(label="📊 Total Models", value=total_models)
+            # A string delta would draw a trend arrow, so the size label goes in a caption
+            st.caption(model_status)
     
-    st.markdown("<br>", unsafe_allow_html=True)
+    # One (category, rule, violations) row per violated rule, shared by the chart and the details table
+    violation_rows = tuple(
+        (details["category"], details["name"], details["count"])
+        for details in metrics["violation_details"].values()
+    )
     
     # Affected Models Summary
     st.subheader("Affected Models Summary")
     st.markdown("**Affected Models by Category (Blocked by Rule)**")
     
-    # Create horizontal stacked bar chart data
-    if metrics["violation_details"]:
-        # Prepare data for stacked horizontal bar chart
-        chart_data = []
-        categories = set()
-        
-        # Collect all data points
-        for rule_key, details in metrics["violation_details"].items():
-            chart_data.append({
-                "Category": details["category"],
-                "Rule": details["name"],
-                "Violations": details["count"]
-            })
-            categories.add(details["category"])
-        
-        if chart_data:
-            # Create DataFrame
-            df = pd.DataFrame(chart_data)
-            
-            # Create horizontal stacked bar chart using Plotly
-            fig = px.bar(
-                df, 
-                x="Violations", 
-                y="Category", 
-                color="Rule",
-                orientation='h',
-                title="Violations by Category and Rule",
-                labels={"Violations": "Number of Violations", "Category": "Category"},
-                height=400
-            )
-            
-            # Update layout for better appearance
-            fig.update_layout(
-                showlegend=True,
-                legend=dict(
-                    orientation="v",
-                    yanchor="top",
-                    y=1,
-                    xanchor="left",
-                    x=1.02
-                ),
-                margin=dict(l=20, r=150, t=50, b=20),
-                xaxis_title="Number of Violations",
-                yaxis_title="Category"
-            )
-            
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.success("🎉 No violations found across all categories!")
+    # Create horizontal stacked bar chart
+    if violation_rows:
+        st.plotly_chart(build_violations_bar(violation_rows), use_container_width=True)
     else:
         st.success("🎉 No rule violations detected!")
     # Affected Models Details
     st.subheader("Affected Models Details")
     
-    if metrics["violation_details"]:
+    if violation_rows:
         # Create detailed breakdown table
-        detail_data = []
-        for rule_key, details in metrics["violation_details"].items():
-            detail_data.append({
-                "Category": details["category"],
-                "Rule": details["name"],
-                "Violations": details["count"]
-            })
-        
-        detail_df = pd.DataFrame(detail_data)
+        detail_df = pd.DataFrame(violation_rows, columns=["Category", "Rule", "Violations"])
         
-        # Group by category and display
-        for category in detail_df["Category"].unique():
-            cat_data = detail_df[detail_df["Category"] == category]
+        # Group by category and display (single hash-based pass, keeping category order)
+        for category, cat_data in detail_df.groupby("Category", sort=False):
             with st.expander(f"{category} ({cat_data['Violations'].sum()} violations)"):
                 st.dataframe(cat_data[["Rule", "Violations"]], hide_index=True, use_container_width=True)
     else:
         st.success("🎉 No rule violations detected!")
     
     # Project Structure Breakdown
-    st.subheader("Project Structure Breakdown")
-    st.markdown("**Distribution of Model Types**")
-
-    # Query all model data from Snowflake
-    models_query = f"""
-    SELECT model_type, database, REPLACE(schema, 'RESULTS_') AS schema, materialized, directory_path, file_name, number_lines, sql_complexity
-    FROM {fq_table('INT_ALL_GRAPH_RESOURCES')}
-    WHERE resource_type = 'model'
-    """
-    models_df = None
-    try:
-        models_df = execute_snowflake_query(models_query)
-    except Exception as e:
-        st.error(f"Error loading model details: {str(e)}")
-
-    # Pie chart: count per model_type
-    selected_model_type = None
-    if models_df is not None and not models_df.empty:
-        # Normalize column names to lowercase
-        models_df.columns = [col.lower() for col in models_df.columns]
-        model_type_col = "model_type" if "model_type" in models_df.columns else models_df.columns[0]
-        # Group by model_type and count unique models
-        model_type_counts = models_df.groupby(model_type_col).size().reset_index(name="count")
-        data_dict = dict(zip(model_type_counts['model_type'], model_type_counts['count']))
-        
-        # Create pie chart using Streamlit's built-in chart
-        model_types_df = pd.DataFrame([
-            {"Model Type": model_type, "Count": percentage} 
-            for model_type, percentage in data_dict.items()
-        ])
-
-        # Use Streamlit's pie chart
-        st.plotly_chart(
-            {
-                "data": [
-                    {
-                        "values": list(data_dict.values()),
-                        "labels": list(data_dict.keys()),
-                        "type": "pie",
-                        "name": "Model Types"
-                    }
-                ],
-                "layout": {
-                    "title": "Model Type Distribution",
-                    "showlegend": True
-                }
-            }, 
-            use_container_width=True
-        )
-
-        st.dataframe(models_df, use_container_width=True, hide_index=True)
-    else:
-        st.info("No model type data available.")
+    display_project_structure_breakdown()
 
 def display_snowflake_connection_sidebar():
     """Display Snowflake connection form in sidebar"""
@@ -1249,10 +1447,7 @@ def display_snowflake_connection_sidebar():
     if IS_SNOWFLAKE_NATIVE:
         # Test the connection to make sure it works
         try:
-            test_query = "SELECT CURRENT_USER() as current_user"
-            test_result = execute_snowflake_query(test_query)
-            if test_result is not None and not test_result.empty:
-                connection_established = True
+            connection_established = get_current_user() is not None
         except Exception:
             pass
     elif st.session_state.get("snowflake_connected"):
@@ -1328,6 +1523,11 @@ def display_snowflake_connection_sidebar():
         else:
             st.sidebar.warning("No databases found")
         
+        # Database and schema lists are cached; let users pick up newly created ones
+        if st.sidebar.button("🔄 Refresh metadata", key="refresh_metadata", use_container_width=True):
+            get_snowflake_metadata(st.session_state.get('selected_database'), refresh=True)
+            st.rerun()
+        
         st.sidebar.markdown("---")
 
     # Snowflake Connection section (now appears second)
@@ -1436,10 +1636,8 @@ def display_snowflake_connection_sidebar():
         
         # Test the connection to make sure it works
         try:
-            test_query = "SELECT CURRENT_USER() as current_user"
-            test_result = execute_snowflake_query(test_query)
-            if test_result is not None and not test_result.empty:
-                current_user = test_result.iloc[0]['CURRENT_USER']
+            current_user = get_current_user()
+            if current_user is not None:
                 st.sidebar.info(f"Connected as: {current_user}")
                 connection_established = True
             else:
@@ -1456,8 +1654,7 @@ def display_snowflake_connection_sidebar():
         connection_type = "🔐 Secrets Configuration" if st.session_state.get("secrets_connected") else "🔧 Manual Configuration"
         st.sidebar.success(f"✅ Connected ({connection_type})")
         if st.sidebar.button("Disconnect"):
-            if st.session_state.snowflake_conn:
-                st.session_state.snowflake_conn.close()
+            close_snowflake_connection()
             st.session_state.snowflake_connected = False
             st.session_state.snowflake_conn = None
             st.session_state.secrets_connected = False
@@ -1484,34 +1681,122 @@ def display_snowflake_connection_sidebar():
 
     return connection_established
 
+# Local markdown images, optionally followed by a { width=... } attribute block
+_IMG_RE = re.compile(r'!\[([^\]]*)\]\((images/[^)]+)\)(\{[^}]*\})?')
+_WIDTH_RE = re.compile(r'width\s*=\s*(\d+)')
+
 def render_markdown_with_images(md_text):
     """Render markdown and display images using st.image for local images with { width=... }, preserving image position."""
-    image_pattern = r'!\[([^\]]*)\]\((images/[^)]+)\)(\{[^}]*\})?'
-    def image_replacer(match):
-        alt_text = match.group(1)
-        img_path = match.group(2)
-        attr = match.group(3)
+    # Walk the images once, rendering the markdown between them in order
+    pos = 0
+    for match in _IMG_RE.finditer(md_text):
+        text = md_text[pos:match.start()]
+        if text.strip():
+            st.markdown(text, unsafe_allow_html=True)
+        alt_text, img_path, attr = match.groups()
         width = None
         if attr:
-            width_match = re.search(r'width\s*=\s*(\d+)', attr)
+            width_match = _WIDTH_RE.search(attr)
             if width_match:
                 width = int(width_match.group(1))
-        # Render image and return a unique placeholder
-        placeholder = f"[[IMAGE_PLACEHOLDER_{hash(img_path)}]]"
-        st.session_state[placeholder] = (img_path, alt_text, width)
-        return placeholder
-    # Replace images with placeholders
-    md_text_with_placeholders = re.sub(image_pattern, image_replacer, md_text)
-    # Split by placeholders and render in order
-    parts = re.split(r'(\[\[IMAGE_PLACEHOLDER_\-?\d+\]\])', md_text_with_placeholders)
-    for part in parts:
-        img_match = re.match(r'\[\[IMAGE_PLACEHOLDER_\-?\d+\]\]', part)
-        if img_match and part in st.session_state:
-            img_path, alt_text, width = st.session_state[part]
-            st.image(img_path, caption=alt_text, width=width)
-        else:
-            if part.strip():
-                st.markdown(part, unsafe_allow_html=True)
+        st.image(img_path, caption=alt_text, width=width)
+        pos = match.end()
+    text = md_text[pos:]
+    if text.strip():
+        st.markdown(text, unsafe_allow_html=True)
+
+@st.cache_data(show_spinner=False, hash_funcs={pd.DataFrame: df_fingerprint})
+def _df_to_csv(df: pd.DataFrame) -> bytes:
+    """Encode a DataFrame as CSV bytes (cached on its content, so reruns don't re-encode it)"""
+    return df.to_csv(index=False).encode("utf-8")
+
+@st.fragment
+def display_violations_tab(rule_key: str) -> None:
+    """Violations tab body; a fragment, so Load/Refresh only rerun this tab instead of the whole page"""
+    if not (st.session_state.get("snowflake_connected") or IS_SNOWFLAKE_NATIVE):
+        st.info("Connect to Snowflake in the sidebar to view violations data")
+    elif not is_valid_identifier(rule_key):
+        st.warning(f"Rule key `{rule_key}` is not a valid table name, so violations cannot be queried.")
+    else:
+        # Every rule's tabs render on each rerun (even inside collapsed expanders), so only pull
+        # the violation rows once the user asks for them; the preloaded count is enough until then
+        if _get_violations(rule_key) is None and get_violation_count(rule_key) != 0:
+            violation_count = get_violation_count(rule_key)
+            if violation_count is not None:
+                st.info(f"⚠️ {violation_count} violation(s) recorded for this rule")
+            if st.button("📥 Load violations", key=f"load_violations_{rule_key}"):
+                with st.spinner("Loading violations..."):
+                    get_violations_df(rule_key)
+        
+        # Show query and refresh button
+        col1, col2 = st.columns([1, 4])
+        with col1:
+            if st.button(f"🔄 Refresh", key=f"refresh_{rule_key}", use_container_width=True):
+                # get_violations_df(refresh=True) bypasses the query cache so the refresh hits Snowflake
+                with st.spinner("Refreshing violations data..."):
+                    get_violations_df(rule_key, refresh=True)
+        
+        with col2:
+            # The query that produced the rows below: limited unless the full table was loaded
+            limit = None if rule_key in st.session_state.get("violations_full", set()) else VIOLATION_ROW_LIMIT
+            st.code(violations_query(rule_key, limit), language="sql")
+        
+        # Display results if available
+        df = _get_violations(rule_key)
+        if df is None and get_violation_count(rule_key) == 0:
+            st.success("🎉 No violations found for this rule!")
+        elif df is not None:
+            if df.empty:
+                st.success("🎉 No violations found for this rule!")
+            else:
+                # Remove empty rows more aggressively
+                df_filtered = df.copy()
+                
+                # First remove rows where all values are NaN
+                df_filtered = df_filtered.dropna(how='all')
+                
+                # Remove rows where all values are empty strings, whitespace, or common null representations
+                if not df_filtered.empty:
+                    # Convert all columns to string and check for empty/null-like values
+                    def is_empty_row(row):
+                        for value in row:
+                            str_val = str(value).strip().lower()
+                            # Check if value is meaningful (not empty, null, none, nan, etc.)
+                            if str_val and str_val not in ['nan', 'none', 'null', '', 'na', '<na>']:
+                                return False
+                        return True
+                    
+                    # Filter out empty rows
+                    df_filtered = df_filtered[~df_filtered.apply(is_empty_row, axis=1)]
+                
+                if df_filtered.empty:
+                    st.success("🎉 No violations found for this rule!")
+                else:
+                    violation_count = get_violation_count(rule_key)
+                    if violation_count is not None and violation_count > len(df):
+                        st.warning(f"⚠️ Found {violation_count} violation(s) - showing the first {len(df)}")
+                        if st.button(f"📥 Load all {violation_count} rows", key=f"load_all_violations_{rule_key}"):
+                            with st.spinner("Loading all violations..."):
+                                get_violations_df(rule_key, refresh=True, limit=None)
+                            st.rerun(scope="fragment")
+                    else:
+                        st.warning(f"⚠️ Found {len(df_filtered)} violation(s)")
+                                        
+                    # Display the filtered data table
+                    st.dataframe(
+                        df_filtered, 
+                        use_container_width=True,
+                        height=400
+                    )
+                                    
+                    # Add download button for filtered data
+                    st.download_button(
+                        label="📥 Download as CSV",
+                        data=_df_to_csv(df_filtered),
+                        file_name=f"violations_{rule_key}.csv",
+                        mime="text/csv",
+                        use_container_width=True
+                    )
 
 def display_rule_viewer(rule_data: Dict[str, str], rule_key: str) -> None:
     """Display rule in read-only viewer mode"""
@@ -1539,80 +1824,22 @@ def display_rule_viewer(rule_data: Dict[str, str], rule_key: str) -> None:
         render_markdown_with_images(rule_data.get("remediation", "No remediation steps available"))
     
     with tab6:
-        
-        if not (st.session_state.get("snowflake_connected") or IS_SNOWFLAKE_NATIVE):
-            st.info("Connect to Snowflake in the sidebar to view violations data")
-        else:
-            # Create the query
-            query = f"SELECT * FROM {fq_table(rule_key)}"
-            
-            # Auto-load violations if not already loaded
-            if f"violations_{rule_key}" not in st.session_state:
-                with st.spinner("Loading violations..."):
-                    df = execute_snowflake_query(query)
-                    if df is not None:
-                        st.session_state[f"violations_{rule_key}"] = df
-            
-            # Show query and refresh button
-            col1, col2 = st.columns([1, 4])
-            with col1:
-                if st.button(f"🔄 Refresh", key=f"refresh_{rule_key}", use_container_width=True):
-                    with st.spinner("Refreshing violations data..."):
-                        df = execute_snowflake_query(query)
-                        if df is not None:
-                            st.session_state[f"violations_{rule_key}"] = df
-            
-            with col2:
-                st.code(query, language="sql")
-            
-            # Display results if available
-            if f"violations_{rule_key}" in st.session_state:
-                df = st.session_state[f"violations_{rule_key}"]
-                
-                if df.empty:
-                    st.success("🎉 No violations found for this rule!")
-                else:
-                    # Remove empty rows more aggressively
-                    df_filtered = df.copy()
-                    
-                    # First remove rows where all values are NaN
-                    df_filtered = df_filtered.dropna(how='all')
-                    
-                    # Remove rows where all values are empty strings, whitespace, or common null representations
-                    if not df_filtered.empty:
-                        # Convert all columns to string and check for empty/null-like values
-                        def is_empty_row(row):
-                            for value in row:
-                                str_val = str(value).strip().lower()
-                                # Check if value is meaningful (not empty, null, none, nan, etc.)
-                                if str_val and str_val not in ['nan', 'none', 'null', '', 'na', '<na>']:
-                                    return False
-                            return True
-                        
-                        # Filter out empty rows
-                        df_filtered = df_filtered[~df_filtered.apply(is_empty_row, axis=1)]
-                    
-                    if df_filtered.empty:
-                        st.success("🎉 No violations found for this rule!")
-                    else:
-                        st.warning(f"⚠️ Found {len(df_filtered)} violation(s)")
-                                            
-                        # Display the filtered data table
-                        st.dataframe(
-                            df_filtered, 
-                            use_container_width=True,
-                            height=400
-                        )
-                                        
-                        # Add download button for filtered data
-                        csv = df_filtered.to_csv(index=False)
-                        st.download_button(
-                            label="📥 Download as CSV",
-                            data=csv,
-                            file_name=f"violations_{rule_key}.csv",
-                            mime="text/csv",
-                            use_container_width=True
-                        )
+        display_violations_tab(rule_key)
+
+def _on_category_selected() -> None:
+    """Show the rules of the category picked in the sidebar (runs before the rerun, so the sidebar is up to date)"""
+    st.session_state.selected_category = st.session_state.category_nav
+    st.session_state.nav_mode = "View Rules"
+
+# Sidebar emoji for each rule category
+CATEGORY_EMOJIS = {
+    "Modeling": "🏗️",
+    "Testing": "🧪",
+    "Structure": "🏛️",
+    "Documentation": "📚",
+    "Governance": "⚖️",
+    "Performance": "⚡"
+}
 
 def main():
     """Main application function"""
@@ -1632,7 +1859,7 @@ def main():
     init_snowflake_connection()
     
     # Load data
-    rules_data = load_rules_data()
+    rules_data = load_rules_data(_rules_file_version())
     
     if not rules_data:
         st.error("No rules data available. Please ensure the JSON file exists.")
@@ -1652,8 +1879,11 @@ def main():
             st.session_state.nav_mode = st.session_state['mode_override']
         del st.session_state['mode_override']
     
+    # Read once; the navigation widgets below rerun the script whenever they change it
+    nav_mode = st.session_state.nav_mode
+    
     # Navigation - Category menu items
-    categories = list(rules_data.keys())
+    categories = tuple(rules_data)
     
     # Initialize selected_category from session state or default to first category
     if 'selected_category' not in st.session_state and categories:
@@ -1665,47 +1895,32 @@ def main():
     if categories:
         # Dashboard button at the top
         if st.sidebar.button("📊 Overview Dashboard", use_container_width=True, 
-                            type="primary" if st.session_state.nav_mode == "Dashboard" else "secondary"):
-            st.session_state.nav_mode = "Dashboard"
-            st.rerun()
+                            type="primary" if nav_mode == "Dashboard" else "secondary"):
+            # The click has already triggered a rerun; only rerun again to refresh the button styles
+            if nav_mode != "Dashboard":
+                st.session_state.nav_mode = "Dashboard"
+                st.rerun()
         
         st.sidebar.markdown("### Categories")
         
-        # Map categories to appropriate emojis
-        category_emojis = {
-            "Modeling": "🏗️",
-            "Testing": "🧪", 
-            "Structure": "🏛️",
-            "Documentation": "📚",
-            "Governance": "⚖️",
-            "Performance": "⚡"
-        }
-        
-        # Create buttons for each category
-        for category in categories:
-            emoji = category_emojis.get(category, "📁")  # Default to folder if not mapped
-            button_type = "primary" if st.session_state.get('selected_category') == category else "secondary"
-            
-            # Custom CSS for left-aligned button text
-            st.markdown("""
-            <style>
-            div[data-testid="stSidebar"] .stButton > button {
-                text-align: left !important;
-                justify-content: flex-start !important;
-            }
-            </style>
-            """, unsafe_allow_html=True)
-            
-            if st.sidebar.button(f"{emoji} {category}", use_container_width=True, 
-                                key=f"nav_{category}",
-                                type=button_type):
-                st.session_state.selected_category = category
-                st.session_state.nav_mode = "View Rules"
-                st.rerun()
+        # One radio for all categories; only shows a selection while viewing rules
+        if nav_mode == "View Rules" and st.session_state.selected_category in categories:
+            st.session_state.category_nav = st.session_state.selected_category
+        else:
+            st.session_state.category_nav = None
+        st.sidebar.radio(
+            "Categories",
+            categories,
+            key="category_nav",
+            format_func=lambda category: f"{CATEGORY_EMOJIS.get(category, '📁')} {category}",  # Default to folder if not mapped
+            on_change=_on_category_selected,
+            label_visibility="collapsed"
+        )
         
         if st.sidebar.button("⚙️ Rule Settings", use_container_width=True):
-            st.session_state.nav_mode = "Rule Settings"
-            st.rerun()
+            if nav_mode != "Rule Settings":
+                st.session_state.nav_mode = "Rule Settings"
+                st.rerun()
         
         # Get current selection
         selected_category = st.session_state.get('selected_category')
@@ -1715,12 +1930,9 @@ def main():
             return
         
         # Get rules for selected category (only when not in Rule Settings)
-        if st.session_state.nav_mode != "Rule Settings":
+        if nav_mode != "Rule Settings":
             category_rules = rules_data.get(selected_category, {}).get("rules", {})
     
-    # Get current mode
-    mode = st.session_state.nav_mode
-    
     # Add Snowflake connection sidebar
     snowflake_connected = display_snowflake_connection_sidebar()
     
@@ -1729,18 +1941,22 @@ def main():
         snowflake_connected = True
     
     # Preload violations if connected to Snowflake (only when not in Rule Settings or Dashboard needs them)
-    if snowflake_connected and st.session_state.nav_mode in ["View Rules", "Dashboard"]:
-        preload_violations_for_rules(rules_data)
+    if snowflake_connected and nav_mode in ["View Rules", "Dashboard"]:
+        # Counts are loaded once per session; this re-reads them from Snowflake after a new dbt run
+        refresh_violations = st.sidebar.button("🔄 Refresh violations", key="refresh_violations", use_container_width=True)
+        if refresh_violations:
+            clear_all_cached_data()
+        preload_violations_for_rules(rules_data, refresh=refresh_violations)
     
     # Display category information for View Rules mode (skip for Rule Settings and Dashboard)
-    if st.session_state.nav_mode == "View Rules" and selected_category:
+    if nav_mode == "View Rules" and selected_category:
         st.markdown(f'<h2 class="category-header">{selected_category} Rules</h2>', unsafe_allow_html=True)
     
     # Mode-specific functionality
-    if st.session_state.nav_mode == "Dashboard":
+    if nav_mode == "Dashboard":
         display_dashboard_overview(rules_data)
         
-    elif st.session_state.nav_mode == "View Rules":
+    elif nav_mode == "View Rules":
         if not category_rules:
             st.info(f"No rules available in the {selected_category} category.")
             return
@@ -1751,7 +1967,7 @@ def main():
             with st.expander(rule_title, expanded=False):
                 display_rule_viewer(rule_data, rule_key)
       
-    elif st.session_state.nav_mode == "Rule Settings":
+    elif nav_mode == "Rule Settings":
         st.subheader("Rule Settings - Export/Import")
         
         # Show environment-specific information
@@ -1779,15 +1995,13 @@ def main():
             )
             
             if export_options:
-                # Create filtered data for export
-                export_data = {cat: rules_data[cat] for cat in export_options if cat in rules_data}
-                
-                # Convert to JSON string
-                json_string = json.dumps(export_data, indent=2, ensure_ascii=False)
+                # Create filtered data for the preview (options come from rules_data, so every key exists)
+                export_data = {cat: rules_data[cat] for cat in export_options}
                 
                 st.download_button(
                     label="Download JSON",
-                    data=json_string,
+                    # Bytes go straight to the button; unchanged selections reuse the cached payload
+                    data=export_rules_json(tuple(export_options), _rules_file_version()),
                     file_name=f"dbt_rules_export_{'-'.join(export_options)}.json",
                     mime="application/json",
                     use_container_width=True
@@ -1804,9 +2018,8 @@ def main():
             
             if uploaded_file is not None:
                 try:
-                    # Read the uploaded file
-                    stringio = StringIO(uploaded_file.getvalue().decode("utf-8"))
-                    import_data = json.load(stringio)
+                    # Read the uploaded file (parsed straight from bytes, no decode step)
+                    import_data = json_loads(uploaded_file.getvalue())
                     
                     st.success("File loaded successfully!")
                     
@@ -1841,7 +2054,7 @@ def main():
                         else:
                             st.error("Failed to import rules.")
                 
-                except json.JSONDecodeError:
+                except json.JSONDecodeError:  # orjson.JSONDecodeError is a subclass
                     st.error("Invalid JSON file format!")
                 except Exception as e:
                     st.error(f"Error reading file: {str(e)}")
@@ -9,16 +9,27 @@ Date: Sept 3, 2025
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import re
 import json
 import os
 import hashlib
-from typing import Dict, List, Optional
+import tempfile
+import time
+from typing import Dict, List, Optional, TextIO
 from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
-@dataclass
+
+@dataclass(frozen=True)
 class Rule:
     """Data class to represent a dbt project evaluator rule"""
     name: str
@@ -33,7 +44,28 @@ class Rule:
 class DBTRuleParser:
     """Parses markdown content from dbt project evaluator documentation https://github.com/dbt-labs/dbt-project-evaluator"""
     
-    def __init__(self):
+    # Patterns are compiled once and shared by every rule section
+    _SECTION_SPLIT_RE = re.compile(r'\n## ')
+    _TABLE_RE = re.compile(r'`(fct_[^`]+)`')
+    _DESCRIPTION_RE = re.compile(r'`[^`]+`[^.]*\. ([^.]+\.)')
+    # Bold section headers split a rule section into (header, body) pairs in a single pass
+    _FIELD_SPLIT_RE = re.compile(r'\*\*(Example|Exceptions?|Reason to Flag|How to Remediate)\*\*\s*\n\n')
+    _FIELD_BODY_RE = re.compile(r'([^*]+?)(?=\n\*\*|\n---|$)', re.DOTALL)
+    _FIELD_NAMES = {
+        'Example': 'example',
+        'Exception': 'exception',
+        'Exceptions': 'exception',
+        'Reason to Flag': 'reason_to_flag',
+        'How to Remediate': 'remediation',
+    }
+    _IMAGE_RE = re.compile(r'!\[([^\]]*)\]\((https?://[^)]+)\)(\{[^}]*\})?')
+    _UNSAFE_FILENAME_CHARS_RE = re.compile(r'[^a-zA-Z0-9_-]')
+    
+    def __init__(self, log: Optional[TextIO] = None, deadline: Optional[float] = None):
+        # Progress messages go to log (stdout by default); deadline is a time.monotonic() value
+        # after which generation stops with TimeoutError
+        self.log = log
+        self.deadline = deadline
         self.urls = {
             'Modeling': 'https://raw.githubusercontent.com/dbt-labs/dbt-project-evaluator/refs/heads/main/docs/rules/modeling.md',
             'Testing': 'https://raw.githubusercontent.com/dbt-labs/dbt-project-evaluator/refs/heads/main/docs/rules/testing.md',
@@ -42,15 +74,27 @@ class DBTRuleParser:
             'Governance': 'https://raw.githubusercontent.com/dbt-labs/dbt-project-evaluator/refs/heads/main/docs/rules/governance.md',
             'Performance': 'https://raw.githubusercontent.com/dbt-labs/dbt-project-evaluator/refs/heads/main/docs/rules/performance.md'
         }
+        # One pooled session so pages and images reuse keep-alive connections instead of a new TLS handshake each
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=Retry(total=3, backoff_factor=0.3))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.images_dir = os.path.join(os.path.dirname(__file__), '../images')
+        os.makedirs(self.images_dir, exist_ok=True)
+
+    def _check_deadline(self):
+        """Raise TimeoutError once the overall deadline has passed"""
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise TimeoutError("Rule generation exceeded its time limit")
 
     def fetch_content(self, url: str) -> str:
         """Fetch content from a URL"""
         try:
-            response = requests.get(url, timeout=30)
+            response = self.session.get(url, timeout=30)
             response.raise_for_status()
             return response.text
         except Exception as e:
-            print(f"Error fetching {url}: {e}")
+            print(f"Error fetching {url}: {e}", file=self.log)
             return ""
 
     def parse_rule_sections(self, content: str) -> List[Rule]:
@@ -58,49 +102,91 @@ class DBTRuleParser:
         rules = []
         
         # Split content by ## headers (rule sections)
-        sections = re.split(r'\n## ', content)
+        sections = self._SECTION_SPLIT_RE.split(content)
         
         for section in sections[1:]:  # Skip first empty section
             try:
                 rule = self._parse_single_rule(section)
                 if rule:
                     rules.append(rule)
+            except TimeoutError:
+                raise
             except Exception as e:
-                print(f"Error parsing rule section: {e}")
+                print(f"Error parsing rule section: {e}", file=self.log)
                 continue
         
         return rules
 
+    def _download_image(self, url: str, alt_text: str, rule_key: str) -> Optional[str]:
+        """Download a single image into the images folder, returning its relative path (None if the download fails)"""
+        parsed_url = urlparse(url)
+        ext = os.path.splitext(parsed_url.path)[1]
+        safe_alt = self._UNSAFE_FILENAME_CHARS_RE.sub('_', alt_text)[:30]
+        self._check_deadline()
+        # Stream the image to a temporary file, computing the md5sum as chunks arrive
+        tmp_path = None
+        try:
+            md5 = hashlib.md5()
+            with self.session.get(url, timeout=30, stream=True) as resp:
+                resp.raise_for_status()
+                with tempfile.NamedTemporaryFile('wb', dir=self.images_dir, suffix='.part', delete=False) as f:
+                    tmp_path = f.name
+                    for chunk in resp.iter_content(chunk_size=64 * 1024):
+                        md5.update(chunk)
+                        f.write(chunk)
+            md5sum = md5.hexdigest()[:8]
+            filename = f"{rule_key}_{safe_alt}_{md5sum}{ext}" if safe_alt else f"{rule_key}_{md5sum}{ext}"
+            local_path = os.path.join(self.images_dir, filename)
+            rel_path = f"images/{filename}"
+            if not os.path.exists(local_path):
+                os.replace(tmp_path, local_path)
+                tmp_path = None
+                print(f"Downloaded image: {url} -> {rel_path}", file=self.log)
+            return rel_path
+        except Exception as e:
+            print(f"Failed to download image: {url} ({e})", file=self.log)
+            return None
+        finally:
+            # Already on disk (or failed) - drop the partial download
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
     def _download_and_replace_images(self, text: str, rule_key: str) -> str:
         """Download images in markdown and replace their links with local paths, appending md5sum to filename"""
-        image_pattern = r'!\[([^\]]*)\]\((https?://[^)]+)\)(\{[^}]*\})?'
-        images_dir = os.path.join(os.path.dirname(__file__), '../images')
-        os.makedirs(images_dir, exist_ok=True)
-        def replacer(match):
+        matches = list(self._IMAGE_RE.finditer(text))
+        if not matches:
+            return text
+        
+        # Download every distinct (url, alt text) image concurrently, then rewrite the links in one pass
+        images = list(dict.fromkeys((match.group(2), match.group(1)) for match in matches))
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            rel_paths = dict(zip(images, executor.map(lambda image: self._download_image(*image, rule_key), images)))
+        
+        # Rebuild the text from the matches already found instead of scanning it again with re.sub
+        parts = []
+        last_end = 0
+        for match in matches:
             alt_text = match.group(1)
-            url = match.group(2)
             suffix = match.group(3) or ''
-            parsed_url = urlparse(url)
-            ext = os.path.splitext(parsed_url.path)[1]
-            safe_alt = re.sub(r'[^a-zA-Z0-9_-]', '_', alt_text)[:30]
-            # Download image and compute md5sum
-            try:
-                resp = requests.get(url, timeout=30)
-                resp.raise_for_status()
-                img_bytes = resp.content
-                md5sum = hashlib.md5(img_bytes).hexdigest()[:8]
-                filename = f"{rule_key}_{safe_alt}_{md5sum}{ext}" if safe_alt else f"{rule_key}_{md5sum}{ext}"
-                local_path = os.path.join(images_dir, filename)
-                rel_path = f"images/{filename}"
-                if not os.path.exists(local_path):
-                    with open(local_path, 'wb') as f:
-                        f.write(img_bytes)
-                    print(f"Downloaded image: {url} -> {rel_path}")
-            except Exception as e:
-                print(f"Failed to download image: {url} ({e})")
-                return match.group(0)  # Keep original if download fails
-            return f"![{alt_text}]({rel_path}){suffix}"
-        return re.sub(image_pattern, replacer, text)
+            rel_path = rel_paths[(match.group(2), alt_text)]
+            parts.append(text[last_end:match.start()])
+            if rel_path is None:
+                parts.append(match.group(0))  # Keep original if download fails
+            else:
+                parts.append(f"![{alt_text}]({rel_path}){suffix}")
+            last_end = match.end()
+        parts.append(text[last_end:])
+        return ''.join(parts)
+
+    def _split_fields(self, section: str) -> Dict[str, str]:
+        """Split a rule section into its bold-headed fields (first occurrence of each header wins)"""
+        parts = self._FIELD_SPLIT_RE.split(section)
+        fields = {}
+        for header, body in zip(parts[1::2], parts[2::2]):
+            body_match = self._FIELD_BODY_RE.match(body)
+            if body_match:
+                fields.setdefault(self._FIELD_NAMES[header], body_match.group(1).strip())
+        return fields
 
     def _parse_single_rule(self, section: str) -> Optional[Rule]:
         """Parse a single rule section"""
@@ -112,31 +198,29 @@ class DBTRuleParser:
         name = lines[0].strip()
         
         # Extract table name from first paragraph with `fct_` pattern
-        table_match = re.search(r'`(fct_[^`]+)`', section)
+        table_match = self._TABLE_RE.search(section)
         table_name = table_match.group(1) if table_match else f"fct_{name.lower().replace(' ', '_')}"
         
         # Extract description (first paragraph)
-        description_match = re.search(r'`[^`]+`[^.]*\. ([^.]+\.)', section)
+        description_match = self._DESCRIPTION_RE.search(section)
         description = description_match.group(1).strip() if description_match else f"Shows issues related to {name.lower()}"
         
+        fields = self._split_fields(section)
+        
         # Extract example section
-        example_match = re.search(r'\*\*Example\*\*\s*\n\n([^*]+?)(?=\n\*\*|\n---|$)', section, re.DOTALL)
-        example = example_match.group(1).strip() if example_match else "Example not specified in documentation"
+        example = fields.get('example', "Example not specified in documentation")
         example = self._download_and_replace_images(example, table_name)
         
         # Extract exception section
-        exception_match = re.search(r'\*\*Exception[s]?\*\*\s*\n\n([^*]+?)(?=\n\*\*|\n---|$)', section, re.DOTALL)
-        exception = exception_match.group(1).strip() if exception_match else "Not specified in documentation"
+        exception = fields.get('exception', "Not specified in documentation")
         exception = self._download_and_replace_images(exception, table_name)
         
         # Extract reason to flag
-        reason_match = re.search(r'\*\*Reason to Flag\*\*\s*\n\n([^*]+?)(?=\n\*\*|\n---|$)', section, re.DOTALL)
-        reason_to_flag = reason_match.group(1).strip() if reason_match else f"This pattern violates dbt best practices for {name.lower()}"
+        reason_to_flag = fields.get('reason_to_flag', f"This pattern violates dbt best practices for {name.lower()}")
         reason_to_flag = self._download_and_replace_images(reason_to_flag, table_name)
         
         # Extract remediation
-        remediation_match = re.search(r'\*\*How to Remediate\*\*\s*\n\n([^*]+?)(?=\n\*\*|\n---|$)', section, re.DOTALL)
-        remediation = remediation_match.group(1).strip() if remediation_match else f"Follow dbt best practices to resolve {name.lower()} issues"
+        remediation = fields.get('remediation', f"Follow dbt best practices to resolve {name.lower()} issues")
         remediation = self._download_and_replace_images(remediation, table_name)
         
         return Rule(
@@ -153,19 +237,23 @@ class DBTRuleParser:
         """Generate the complete JSON structure with all rules and diagrams"""
         result = {}
         
-        for category, url in self.urls.items():
-            print(f"Processing {category}...")
+        # Fetch all category pages concurrently (network bound), then parse them in order
+        print("Fetching documentation pages...", file=self.log)
+        with ThreadPoolExecutor(max_workers=len(self.urls)) as executor:
+            contents = dict(zip(self.urls, executor.map(self.fetch_content, self.urls.values())))
+        
+        for category, content in contents.items():
+            self._check_deadline()
+            print(f"Processing {category}...", file=self.log)
             
-            # Fetch content
-            content = self.fetch_content(url)
             if not content:
-                print(f"Skipping {category} due to fetch error")
+                print(f"Skipping {category} due to fetch error", file=self.log)
                 continue
             
             # Parse rules
             rules = self.parse_rule_sections(content)
             if not rules:
-                print(f"No rules found for {category}")
+                print(f"No rules found for {category}", file=self.log)
                 continue
             
             # Generate JSON structure for this category
@@ -184,14 +272,14 @@ class DBTRuleParser:
                     }
                     
                     category_data["rules"][rule.table_name] = rule_data
-                    print(f"Added rule: {rule.name}")
+                    print(f"Added rule: {rule.name}", file=self.log)
                     
                 except Exception as e:
-                    print(f"Error processing rule {rule.name}: {e}")
+                    print(f"Error processing rule {rule.name}: {e}", file=self.log)
                     continue
             
             result[category] = category_data
-            print(f"Completed {category} with {len(category_data['rules'])} rules")
+            print(f"Completed {category} with {len(category_data['rules'])} rules", file=self.log)
         
         return result
 
@@ -204,14 +292,17 @@ class DBTRuleParser:
             paths = [filename]
         for path in paths:
             try:
-                with open(path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
-                print(f"Successfully saved to {path}")
+                with open(path, 'wb') as f:
+                    if ORJSON_AVAILABLE:
+                        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+                    else:
+                        f.write(json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8'))
+                print(f"Successfully saved to {path}", file=self.log)
                 return
             except Exception as e:
-                print(f"Error saving to file: {e}")
+                print(f"Error saving to file: {e}", file=self.log)
                 tried_paths.append(path)
-        print(f"Could not save to any of the following paths: {tried_paths}")
+        print(f"Could not save to any of the following paths: {tried_paths}", file=self.log)
 
 
 def main():